@@ -10,6 +10,7 @@ from typing import Dict, List, Optional, Tuple, Union, Any
 import aiohttp
 from redbot.core import commands, Config
 from redbot.core.bot import Red
+from redbot.core.data_manager import cog_data_path
 from redbot.core.utils.chat_formatting import pagify, box
 from redbot.core.utils.menus import menu, DEFAULT_CONTROLS
 from redbot.core.utils.predicates import MessagePredicate
@@ -17,12 +18,17 @@ from redbot.core.utils.predicates import MessagePredicate
 log = logging.getLogger("red.animeforum")
 
 # Import additional modules
-from .malapi import MyAnimeListAPI
+from .malapi import MyAnimeListAPI, WEEKDAYS
 from .forumcreator import ForumCreator
 from .cachemanager import CacheManager
+from .catalog import AnimeCatalog
+from .guildsettings import GuildSettingsCache
+from .watchlists import WatchlistStore
+from .digest import AiringDigest
 from .eventmanager import EventManager
 from .analytics import AnalyticsManager
-from .utils import create_embed, chunked_send, check_permissions
+from .ratelimiter import PRIORITY_BULK
+from .utils import create_embed, chunked_send, check_permissions, calculate_anime_seasons
 
 
 class AnimeForumCog(commands.Cog):
@@ -44,7 +50,7 @@ class AnimeForumCog(commands.Cog):
             "use_mal_data": True,
             "default_post_guidelines": True,
             "auto_thread_create": False,
-            "watchlists": {},
+            "watchlists": {},  # Legacy, moved to member watchlists by WatchlistStore.load()
             "watchparties": [],
             "moderation": {
                 "spoiler_detection": True,
@@ -69,13 +75,29 @@ class AnimeForumCog(commands.Cog):
         }
         
         self.config.register_guild(**default_guild)
-        self.config.register_global(mal_client_id=None)
+        self.config.register_global(mal_client_id=None, hedging=False, prewarmed_season=None)
         
         # Initialize components
         self.session = aiohttp.ClientSession()
-        self.cache = CacheManager(expiry=3600, max_size=500)
-        self.mal_api = MyAnimeListAPI(self.session, self.cache)
-        self.forum_creator = ForumCreator(bot, self.config, self.cache)
+        self.cache = CacheManager(
+            expiry=3600,
+            persist_path=cog_data_path(self) / "api_cache.db",
+            stale_ttl=6 * 3600,  # Serve stale data for up to 6 hours while refreshing
+            max_bytes=48 * 1024 * 1024,
+            prefix_quotas={
+                "jikan": 32 * 1024 * 1024,
+                "mal": 12 * 1024 * 1024
+            },
+            negative_expiry=600,  # Remember 404s and empty searches for 10 minutes
+            compress_threshold=1024,  # Hold detail payloads and list pages compressed
+            hot_size=64
+        )
+        self.catalog = AnimeCatalog(persist_path=cog_data_path(self) / "catalog.db")
+        self.mal_api = MyAnimeListAPI(self.session, self.cache, self.catalog)
+        self.guild_settings = GuildSettingsCache(self.config)
+        self.watchlists = WatchlistStore(self.config)
+        self.digest = AiringDigest(bot, self.config, self.mal_api, self.watchlists)
+        self.forum_creator = ForumCreator(bot, self.config, self.cache, self.guild_settings)
         self.event_manager = EventManager(bot, self.config, self.mal_api, self.cache)
         self.analytics = AnalyticsManager(bot, self.config)
         
@@ -86,6 +108,12 @@ class AnimeForumCog(commands.Cog):
         self.bg_tasks = []
         self.start_background_tasks()
         
+    async def cog_load(self):
+        """Apply global settings once the cog is loaded"""
+        self.mal_api.hedging = await self.config.hedging()
+        await self.guild_settings.load_all()
+        await self.watchlists.load()
+        
     def cog_unload(self):
         """Clean up when cog is unloaded"""
         # Cancel background tasks
@@ -95,23 +123,72 @@ class AnimeForumCog(commands.Cog):
         # Close sessions
         asyncio.create_task(self.session.close())
         
+        # Flush and close the disk cache
+        self.cache.close()
+        self.catalog.close()
+        
     def start_background_tasks(self):
         """Start all background tasks for this cog"""
         self.bg_tasks.append(self.bot.loop.create_task(self.event_manager.schedule_checker()))
         self.bg_tasks.append(self.bot.loop.create_task(self.analytics.process_analytics_queue()))
+        self.bg_tasks.append(self.bot.loop.create_task(self.cache.sweeper()))
+        self.bg_tasks.append(self.bot.loop.create_task(self.catalog_refresher()))
+        self.bg_tasks.append(self.bot.loop.create_task(self.mal_api.schedule_refresher()))
+        self.bg_tasks.append(self.bot.loop.create_task(self.season_prewarmer()))
+        self.bg_tasks.append(self.bot.loop.create_task(self.digest.digest_sender()))
+        
+    async def catalog_refresher(self, interval: int = 12 * 3600):
+        """Background task that refills the anime catalog from season and top listings"""
+        await self.bot.wait_until_ready()
+        
+        while True:
+            try:
+                await self.mal_api.refresh_catalog()
+            except Exception as e:
+                log.error(f"Error refreshing anime catalog: {e}")
+                
+            await asyncio.sleep(interval)
+            
+    async def season_prewarmer(self, interval: int = 3600, top_details: int = 25):
+        """
+        Background task that prewarms the cache when a new anime season starts
+        
+        The season comes from the local calendar and is checked every
+        `interval` seconds. The last warmed season is kept in the global
+        config, so a restart mid-season doesn't warm it again.
+        """
+        await self.bot.wait_until_ready()
+        
+        while True:
+            now = datetime.now()
+            season, year = calculate_anime_seasons(now.year, now.month)
+            current = f"{season} {year}"
+            
+            try:
+                if await self.config.prewarmed_season() != current:
+                    warmed = await self.mal_api.prewarm_season(season, year, top_details, PRIORITY_BULK)
+                    # The list is fetched for this season explicitly, so anime in it
+                    # belong to it; an empty list means Jikan has nothing yet, retry later
+                    if warmed["season"]:
+                        await self.config.prewarmed_season.set(current)
+                        log.info(f"Prewarmed cache for {current}: {warmed}")
+            except Exception as e:
+                log.error(f"Error prewarming season cache: {e}")
+                
+            await asyncio.sleep(interval)
         
     async def check_rate_limit(self, ctx, command_type="regular") -> Tuple[bool, str]:
         """Check if a command exceeds rate limits"""
         # Get guild settings for rate limits
-        settings = await self.config.guild(ctx.guild).rate_limits()
+        settings = await self.guild_settings.get(ctx.guild)
         
         # Determine limits based on command type
         if command_type == "bulk":
-            max_per_minute = settings["max_bulk_create"]
+            max_per_minute = settings.max_bulk_create
         else:
-            max_per_minute = settings["max_forums_per_minute"]
+            max_per_minute = settings.max_forums_per_minute
             
-        cooldown = settings["cooldown_seconds"]
+        cooldown = settings.cooldown_seconds
         
         # Get the guild's command history
         guild_id = ctx.guild.id
@@ -140,10 +217,7 @@ class AnimeForumCog(commands.Cog):
 
     async def _get_user_watchlist(self, guild_id, user_id):
         """Get a user's watchlist from the database"""
-        async with self.config.guild_from_id(guild_id).watchlists() as watchlists:
-            if str(user_id) not in watchlists:
-                watchlists[str(user_id)] = []
-            return watchlists[str(user_id)]
+        return await self.watchlists.get(guild_id, user_id)
 
     async def _add_to_watchlist(self, guild_id, user_id, anime_data):
         """Add an anime to a user's watchlist"""
@@ -158,32 +232,13 @@ class AnimeForumCog(commands.Cog):
             "last_updated": datetime.now().isoformat()
         }
         
-        async with self.config.guild_from_id(guild_id).watchlists() as watchlists:
-            if str(user_id) not in watchlists:
-                watchlists[str(user_id)] = []
-                
-            # Check if already in watchlist
-            for existing in watchlists[str(user_id)]:
-                if existing.get("id") == anime_entry["id"]:
-                    return False  # Already exists
-                    
-            # Add to watchlist
-            watchlists[str(user_id)].append(anime_entry)
-            return True
+        # False if it is already on the list
+        return await self.watchlists.add(guild_id, user_id, anime_entry)
     
     async def _remove_from_watchlist(self, guild_id, user_id, anime_id):
         """Remove an anime from a user's watchlist"""
-        async with self.config.guild_from_id(guild_id).watchlists() as watchlists:
-            if str(user_id) not in watchlists:
-                return False
-                
-            # Find and remove the anime
-            for i, anime in enumerate(watchlists[str(user_id)]):
-                if anime.get("id") == anime_id:
-                    watchlists[str(user_id)].pop(i)
-                    return True
-                    
-            return False  # Not found
+        # False if it wasn't on the list
+        return await self.watchlists.remove(guild_id, user_id, anime_id)
 
     async def _get_watchparties(self, guild_id):
         """Get all scheduled watch parties for a guild"""
@@ -264,6 +319,103 @@ class AnimeForumCog(commands.Cog):
         embed.add_field(name="Config", value="`.animeset` for configuration", inline=False)
         await ctx.send(embed=embed)
 
+    @animecog.command(name="apistats")
+    @commands.is_owner()
+    async def show_api_stats(self, ctx):
+        """Show API request and cache statistics"""
+        request_stats = self.mal_api.get_request_stats()
+        cache_stats = self.cache.get_stats()
+
+        lines = ["[Requests]"]
+        for key, value in request_stats.items():
+            lines.append(f"{key}: {value}")
+
+        lines.append("")
+        lines.append("[Cache]")
+        for key, value in cache_stats.items():
+            lines.append(f"{key}: {value}")
+
+        await ctx.send(box("\n".join(lines), lang="ini"))
+
+    @animecog.command(name="cachestats")
+    @commands.is_owner()
+    async def show_cache_stats(self, ctx):
+        """Show cache hits, misses, evictions, expirations and bytes per key namespace"""
+        metrics = self.cache.metrics
+        overall = metrics.hit_ratio()
+        lines = [
+            f"Hit ratio (last {metrics.window // 60} min): {'n/a' if overall is None else f'{overall:.1%}'}",
+            f"Memory: {len(self.cache.cache)} items, {self.cache.total_bytes // 1024}"
+            f"{'' if self.cache.max_bytes is None else f'/{self.cache.max_bytes // 1024}'} KiB, "
+            f"default expiry {self.cache.expiry}s",
+            ""
+        ]
+        for namespace, stats in metrics.get_stats().items():
+            ratio = stats["hit_ratio"]
+            lines.append(f"[{namespace}]")
+            lines.append(
+                f"hits: {stats['hits']}  stale: {stats['stale_hits']}  misses: {stats['misses']}  "
+                f"disk: {stats['disk_hits']}  ratio: {'n/a' if ratio is None else f'{ratio:.1%}'}"
+            )
+            lines.append(
+                f"evictions: {stats['evictions']}  expirations: {stats['expirations']}  "
+                f"bytes: {stats['bytes']}"
+            )
+
+        for page in pagify("\n".join(lines), delims=["\n["], page_length=1900):
+            await ctx.send(box(page, lang="ini"))
+
+    @animecog.command(name="listenerbench")
+    @commands.is_owner()
+    @commands.guild_only()
+    async def listener_benchmark(self, ctx, iterations: int = 1000):
+        """Time on_message's per-message routing against the old per-message Config read"""
+        iterations = max(1, min(iterations, 100000))
+        message = ctx.message
+        
+        # Before: every message read the guild's full settings from Config
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await self.config.guild(ctx.guild).all()
+        config_time = (time.perf_counter() - start) / iterations
+        
+        # After: one dict lookup and a few attribute checks, nothing awaited
+        route = await self.guild_settings.get_route(ctx.guild)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            self._route_message(message, self.guild_settings.route(ctx.guild) or route)
+        route_time = (time.perf_counter() - start) / iterations
+        
+        lines = [
+            f"iterations: {iterations}",
+            f"config_read: {config_time * 1e6:.2f} us/message",
+            f"routing_table: {route_time * 1e6:.2f} us/message",
+            f"speedup: {config_time / route_time:.0f}x" if route_time else "speedup: n/a",
+            f"anime_forums: {len(route.forum_ids)}"
+        ]
+        await ctx.send(box("\n".join(lines), lang="ini"))
+
+    @animecog.command(name="digest")
+    @commands.is_owner()
+    async def run_digest(self, ctx, weekday: str = None):
+        """Send the watchlist airing digest now (defaults to today)"""
+        if weekday and weekday.capitalize() not in WEEKDAYS:
+            return await ctx.send(f"Unknown weekday '{weekday}'.")
+            
+        async with ctx.typing():
+            result = await self.digest.send_digests(weekday)
+        lines = [f"{key}: {value}" for key, value in result.items()]
+        await ctx.send(box("\n".join(lines), lang="ini"))
+
+    @animecog.command(name="hedging")
+    @commands.is_owner()
+    async def set_hedging(self, ctx, enabled: bool):
+        """Toggle hedged requests (ask Jikan too when MyAnimeList is slow)"""
+        await self.config.hedging.set(enabled)
+        self.mal_api.hedging = enabled
+        state = "enabled" if enabled else "disabled"
+        await ctx.send(f"Hedged requests have been {state}.")
+
     @commands.group()
     @commands.guild_only()
     @commands.admin_or_permissions(manage_guild=True)
@@ -276,18 +428,21 @@ class AnimeForumCog(commands.Cog):
     async def set_prefix(self, ctx, prefix: str):
         """Set the prefix for forum commands (default '.')"""
         await self.config.guild(ctx.guild).forum_command_prefix.set(prefix)
+        self.guild_settings.invalidate(ctx.guild.id)
         await ctx.send(f"Forum command prefix set to: {prefix}")
 
     @animeset.command(name="category")
     async def set_category(self, ctx, *, category_name: str):
         """Set the category name for anime forums"""
         await self.config.guild(ctx.guild).forums_category_name.set(category_name)
+        self.guild_settings.invalidate(ctx.guild.id)
         await ctx.send(f"Anime forums category name set to: {category_name}")
 
     @animeset.command(name="mentionmsg")
     async def set_mention_message(self, ctx, *, message: str):
         """Set the message sent when the bot is mentioned"""
         await self.config.guild(ctx.guild).mention_message.set(message)
+        self.guild_settings.invalidate(ctx.guild.id)
         await ctx.send("Mention message has been updated.")
         
     @animeset.command(name="addtag")
@@ -298,6 +453,7 @@ class AnimeForumCog(commands.Cog):
                 await ctx.send(f"Tag '{tag_name}' already exists.")
                 return
             tags.append(tag_name)
+        self.guild_settings.invalidate(ctx.guild.id)
         await ctx.send(f"Added '{tag_name}' to default forum tags.")
         
     @animeset.command(name="removetag")
@@ -308,6 +464,7 @@ class AnimeForumCog(commands.Cog):
                 await ctx.send(f"Tag '{tag_name}' doesn't exist.")
                 return
             tags.remove(tag_name)
+        self.guild_settings.invalidate(ctx.guild.id)
         await ctx.send(f"Removed '{tag_name}' from default forum tags.")
     
     @animeset.command(name="malclientid")
@@ -342,6 +499,7 @@ class AnimeForumCog(commands.Cog):
             moderation[feature] = not moderation[feature]
             state = "enabled" if moderation[feature] else "disabled"
             
+        self.guild_settings.invalidate(ctx.guild.id)
         await ctx.send(f"Moderation feature '{feature}' has been {state}.")
         
     @animeset.command(name="toggleanalytics")
@@ -355,6 +513,7 @@ class AnimeForumCog(commands.Cog):
             analytics[feature] = not analytics[feature]
             state = "enabled" if analytics[feature] else "disabled"
             
+        self.guild_settings.invalidate(ctx.guild.id)
         await ctx.send(f"Analytics feature '{feature}' has been {state}.")
     
     @animeset.command(name="settings")
@@ -1174,6 +1333,7 @@ class AnimeForumCog(commands.Cog):
         - add [anime_name]: Add an anime to your watchlist
         - remove [anime_name/id]: Remove an anime from your watchlist
         - clear: Clear your entire watchlist
+        - digest [on/off]: Daily DM listing your watchlist anime airing that day (off by default)
         
         Examples:
         .watchlist show
@@ -1181,6 +1341,7 @@ class AnimeForumCog(commands.Cog):
         .watchlist remove One Piece
         .watchlist remove id:21
         .watchlist clear
+        .watchlist digest on
         """
         # Check rate limits
         can_proceed, message = await self.check_rate_limit(ctx)
@@ -1367,17 +1528,30 @@ class AnimeForumCog(commands.Cog):
                     await self.bot.wait_for("message", check=pred, timeout=30)
                     if pred.result:
                         # Clear the watchlist
-                        async with self.config.guild_from_id(guild_id).watchlists() as watchlists:
-                            watchlists[str(user_id)] = []
+                        await self.watchlists.clear(guild_id, user_id)
                         await ctx.send("Your watchlist has been cleared.")
                     else:
                         await ctx.send("Operation cancelled.")
                 except asyncio.TimeoutError:
                     await ctx.send("No response received, operation cancelled.")
             
+            elif action == "digest":
+                # Toggle the daily airing digest (a user setting, shared across servers)
+                if anime_name is None:
+                    enabled = await self.config.user(ctx.author).digest_enabled()
+                    state = "on" if enabled else "off"
+                    return await ctx.send(f"Your daily airing digest is {state}. Use `.watchlist digest on/off` to change it.")
+                    
+                choice = anime_name.lower()
+                if choice not in ("on", "off"):
+                    return await ctx.send("Use `.watchlist digest on` or `.watchlist digest off`.")
+                    
+                await self.config.user(ctx.author).digest_enabled.set(choice == "on")
+                await ctx.send(f"Your daily airing digest has been turned {choice}.")
+            
             else:
                 # Unknown action
-                await ctx.send(f"Unknown action '{action}'. Use 'show', 'add', 'remove', or 'clear'.")
+                await ctx.send(f"Unknown action '{action}'. Use 'show', 'add', 'remove', 'clear' or 'digest'.")
                 
         except Exception as e:
             log.error(f"Error in watchlist command: {e}", exc_info=True)
@@ -1597,35 +1771,71 @@ class AnimeForumCog(commands.Cog):
             
         await self.analytics.show_forum_stats(ctx, forum_name)
 
+    def _route_message(self, message, route) -> Tuple[bool, bool]:
+        """
+        Decide what on_message has to do with a message, without awaiting anything
+        
+        Returns:
+        --------
+        Tuple[bool, bool]: (answer the mention, message is in an anime forum thread)
+        """
+        # Skip mention response in specific channels
+        excluded_channels = [425068612542398476]  # Replace with your general channel IDs
+        if message.channel.id in excluded_channels:
+            return False, False
+            
+        mentioned = (
+            route.answers_mentions and bool(message.mentions)
+            and self.bot.user in message.mentions and not message.mention_everyone
+        )
+        in_forum = isinstance(message.channel, discord.Thread) and message.channel.parent_id in route.forum_ids
+        return mentioned, in_forum
+        
     @commands.Cog.listener()
     async def on_message(self, message):
         if message.author.bot or not message.guild:
             return
             
-        # Get settings for this guild
-        settings = await self.config.guild(message.guild).all()
+        # Precomputed per-guild routing; only the first message of a guild awaits
+        route = self.guild_settings.route(message.guild)
+        if route is None:
+            route = await self.guild_settings.get_route(message.guild)
             
-        # Skip mention response in specific channels
-        excluded_channels = [425068612542398476]  # Replace with your general channel IDs
-        if message.channel.id in excluded_channels:
+        mentioned, in_forum = self._route_message(message, route)
+        if not mentioned and not in_forum:
             return
             
-        # Handle bot mention
-        if self.bot.user in message.mentions and not message.mention_everyone:
-            await message.channel.send(settings["mention_message"])
+        settings = route.settings
             
-        # Process message for analytics
-        if settings["analytics"]["enabled"] and settings["analytics"]["track_activity"]:
-            self.analytics.track_message(message)
+        # Handle bot mention
+        if mentioned:
+            await message.channel.send(settings.mention_message)
             
-        # Handle forum thread interaction
-        if isinstance(message.channel, discord.Thread) and message.channel.parent:
+        if in_forum:
+            # Process message for analytics
+            if route.tracks_messages:
+                self.analytics.track_message(message)
+                
+            # Process message for forum-specific features
             parent_channel = message.channel.parent
-            
-            # Check if parent is a forum channel
             if isinstance(parent_channel, discord.ForumChannel):
-                # Process message for forum-specific features
                 await self.forum_creator.process_thread_message(message, parent_channel, settings)
+                
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        """Forums and categories feed the message routing table"""
+        self.guild_settings.invalidate_route(channel.guild.id)
+        
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        """Forums and categories feed the message routing table"""
+        self.guild_settings.invalidate_route(channel.guild.id)
+        
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        """A forum moved between categories or a category was renamed"""
+        if before.name != after.name or getattr(before, "category_id", None) != getattr(after, "category_id", None):
+            self.guild_settings.invalidate_route(after.guild.id)
     @commands.Cog.listener()
     async def on_thread_create(self, thread):
         """Enhance new threads in anime forums"""
@@ -1634,10 +1844,10 @@ class AnimeForumCog(commands.Cog):
             return
             
         # Get settings for this guild
-        settings = await self.config.guild(thread.guild).all()
+        settings = await self.guild_settings.get(thread.guild)
         
         # Check if in anime category
-        anime_category_name = settings["forums_category_name"]
+        anime_category_name = settings.forums_category_name
         category_name = thread.parent.category.name if thread.parent.category else None
         
         if not category_name or category_name != anime_category_name:
@@ -1647,7 +1857,7 @@ class AnimeForumCog(commands.Cog):
         await self.forum_creator.process_new_thread(thread, settings)
         
         # Track for analytics
-        if settings["analytics"]["enabled"] and settings["analytics"]["track_activity"]:
+        if settings.tracks_messages:
             self.analytics.track_thread_create(thread)
 
 
@@ -1,14 +1,247 @@
+import sys
 import time
+import json
+import heapq
+import asyncio
 import logging
-from typing import Dict, Any, Optional, List
-from collections import OrderedDict
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Tuple, Union
+from collections import OrderedDict, deque
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
 
 log = logging.getLogger("red.animeforum.cache_manager")
 
+# Pool used for keys whose prefix has no quota of its own
+SHARED_POOL = "_shared"
+
+# Classes whose instances can be cached on disk, by name (see register_type)
+SERIALIZABLE_TYPES: Dict[str, type] = {}
+
+
+def register_type(cls: type) -> type:
+    """
+    Class decorator letting instances be written to the disk tier
+    
+    The class provides to_json() returning a JSON-compatible dict and a
+    from_json(dict) classmethod; on disk the dict is tagged with "__type__".
+    """
+    SERIALIZABLE_TYPES[cls.__name__] = cls
+    return cls
+
+
+def _encode(obj: Any) -> Dict[str, Any]:
+    """json.dumps hook for registered types"""
+    name = type(obj).__name__
+    if name not in SERIALIZABLE_TYPES:
+        raise TypeError(f"{name} is not JSON serializable")
+    data = obj.to_json()
+    data["__type__"] = name
+    return data
+
+
+def _decode(data: Dict[str, Any]) -> Any:
+    """json.loads hook rebuilding registered types"""
+    name = data.get("__type__")
+    if name is None or name not in SERIALIZABLE_TYPES:
+        return data
+    del data["__type__"]
+    return SERIALIZABLE_TYPES[name].from_json(data)
+
+
+def dumps(value: Any) -> str:
+    """Serialize a cached value for the disk tier"""
+    return json.dumps(value, separators=(",", ":"), default=_encode)
+
+
+def loads(raw: str) -> Any:
+    """Deserialize a value written by dumps()"""
+    return json.loads(raw, object_hook=_decode)
+
+
+def compress(data: bytes) -> bytes:
+    """Compress a serialized value with lz4 if it is installed, zlib otherwise"""
+    if lz4_frame is not None:
+        return lz4_frame.compress(data)
+    return zlib.compress(data, 6)
+
+
+def decompress(data: bytes) -> bytes:
+    """Reverse compress()"""
+    if lz4_frame is not None:
+        return lz4_frame.decompress(data)
+    return zlib.decompress(data)
+
+
+class CompressedValue:
+    """A cached value held in memory as its compressed serialized form"""
+    
+    __slots__ = ("blob", "raw_size")
+    
+    def __init__(self, blob: bytes, raw_size: int):
+        self.blob = blob
+        self.raw_size = raw_size
+        
+    def unpack(self) -> Any:
+        """Decompress and deserialize the value"""
+        return loads(decompress(self.blob).decode("utf-8"))
+
+
+def key_prefix(key: str) -> str:
+    """Namespace of a cache key, e.g. 'jikan' for 'jikan:anime/1/full:{}'"""
+    return key.split(":", 1)[0]
+
+
+def key_namespace(key: str) -> str:
+    """Prefix plus first endpoint segment of a key, e.g. 'jikan:seasons' for 'jikan:seasons/now:{}'"""
+    prefix, _, rest = key.partition(":")
+    endpoint = rest.split("/", 1)[0].split(":", 1)[0]
+    return f"{prefix}:{endpoint}" if endpoint else prefix
+
+
+class CacheMetrics:
+    """
+    Cache counters per key namespace (see key_namespace)
+    
+    Tracks hits, stale hits, misses, disk hits, evictions, expirations and
+    the bytes held in memory, plus the hit ratio over a rolling window kept
+    as fixed-size time buckets. Stale hits count as hits for the ratio,
+    since the caller got an answer without waiting.
+    """
+    
+    COUNTERS = ("hits", "stale_hits", "misses", "disk_hits", "evictions", "expirations")
+    
+    def __init__(self, window: int = 300, bucket: int = 10):
+        """
+        Initialize cache metrics
+        
+        Parameters:
+        -----------
+        window: int
+            Seconds covered by the rolling hit ratio
+        bucket: int
+            Width in seconds of each bucket of the rolling window
+        """
+        self.window = window
+        self.bucket = bucket
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.bytes: Dict[str, int] = {}
+        self.buckets: Dict[str, deque] = {}  # {namespace: deque([bucket_start, hits, lookups])}
+        
+    def _counters(self, namespace: str) -> Dict[str, int]:
+        """Counters of a namespace, created on first use"""
+        counters = self.counters.get(namespace)
+        if counters is None:
+            counters = self.counters[namespace] = dict.fromkeys(self.COUNTERS, 0)
+        return counters
+        
+    def _prune(self, buckets: deque, now: float) -> None:
+        """Drop buckets that fell out of the window"""
+        while buckets and buckets[0][0] <= now - self.window:
+            buckets.popleft()
+            
+    def record(self, key: str, event: str) -> None:
+        """Count an event ("hits", "misses", ...) for a key's namespace"""
+        namespace = key_namespace(key)
+        self._counters(namespace)[event] += 1
+        if event not in ("hits", "stale_hits", "misses"):
+            return
+            
+        now = time.monotonic()
+        start = now - now % self.bucket
+        buckets = self.buckets.setdefault(namespace, deque())
+        if not buckets or buckets[-1][0] != start:
+            self._prune(buckets, now)
+            buckets.append([start, 0, 0])
+        if event != "misses":
+            buckets[-1][1] += 1
+        buckets[-1][2] += 1
+        
+    def add_bytes(self, key: str, size: int) -> None:
+        """Account size bytes (negative when removing) to a key's namespace"""
+        namespace = key_namespace(key)
+        self.bytes[namespace] = self.bytes.get(namespace, 0) + size
+        
+    def _window(self, namespace: str, now: float) -> Tuple[int, int]:
+        """(hits, lookups) of a namespace within the rolling window"""
+        buckets = self.buckets.get(namespace)
+        if not buckets:
+            return 0, 0
+        self._prune(buckets, now)
+        return sum(bucket[1] for bucket in buckets), sum(bucket[2] for bucket in buckets)
+        
+    def hit_ratio(self, namespace: str = None) -> Optional[float]:
+        """Hit ratio over the rolling window for one namespace or all of them, None without lookups"""
+        now = time.monotonic()
+        namespaces = [namespace] if namespace else list(self.buckets)
+        hits = lookups = 0
+        for name in namespaces:
+            window_hits, window_lookups = self._window(name, now)
+            hits += window_hits
+            lookups += window_lookups
+        return round(hits / lookups, 3) if lookups else None
+        
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-namespace metrics
+        
+        Returns:
+        --------
+        Dict[str, Dict[str, Any]]: {namespace: counters, bytes and hit_ratio}, sorted by namespace
+        """
+        stats = {}
+        for namespace in sorted(set(self.counters) | set(self.bytes)):
+            entry = dict(self._counters(namespace))
+            entry["bytes"] = self.bytes.get(namespace, 0)
+            entry["hit_ratio"] = self.hit_ratio(namespace)
+            stats[namespace] = entry
+        return stats
+
+
 class CacheManager:
-    """Efficient in-memory cache with expiration and LRU eviction"""
+    """Efficient in-memory cache with expiration and LRU eviction
+    
+    An optional SQLite file can be attached as a second tier. Memory misses
+    fall through to disk, so cached API responses survive cog reloads and
+    bot restarts.
     
-    def __init__(self, expiry: int = 3600, max_size: int = 1000):
+    With a non-zero stale_ttl, entries are kept for that long past their
+    expiry. get() still treats them as missing, but get_stale() returns them
+    flagged as stale so the caller can serve them while it refreshes.
+    
+    Memory can also be bounded in bytes. Keys are grouped by prefix (the part
+    before the first ':'); prefixes listed in prefix_quotas get a byte pool of
+    their own, and every other key shares what is left of max_bytes. Eviction
+    is LRU within the pool being written to, so a burst of one kind of entry
+    never flushes another prefix. With max_bytes set, max_size no longer
+    limits the memory tier.
+    
+    Expiry is tracked in a min-heap ordered by expiry timestamp, so
+    clean_expired() only touches entries that have actually expired. Run
+    sweeper() as a background task to purge them periodically; get_stats()
+    is a read-only O(1) call.
+    
+    Negative results (not found, empty search) live in a separate, smaller
+    store with their own short TTL. They never displace real data and are
+    not written to disk.
+    
+    Lookups, evictions and expirations are counted per key namespace in
+    `metrics` (see CacheMetrics), so sizes and TTLs can be tuned from data.
+    
+    Values whose serialized form is at least compress_threshold bytes are
+    held compressed in memory and accounted at their compressed size. The
+    hot_size most recently read ones are also kept decompressed, so busy
+    keys don't pay for decompression on every read.
+    """
+    
+    def __init__(self, expiry: int = 3600, max_size: int = 1000, persist_path: Union[str, Path] = None,
+                 stale_ttl: int = 0, max_bytes: int = None, prefix_quotas: Dict[str, int] = None,
+                 negative_expiry: int = 300, compress_threshold: Optional[int] = 1024, hot_size: int = 64):
         """
         Initialize cache manager
         
@@ -17,28 +250,345 @@ class CacheManager:
         expiry: int
             Default cache expiry time in seconds
         max_size: int
-            Maximum number of items to store before evicting
+            Maximum number of items to store before evicting, when max_bytes is None
+            (with a byte budget the pools bound memory instead); also bounds the negative store
+        persist_path: str or Path, optional
+            SQLite file used as a persistent second tier, or None for memory only
+        stale_ttl: int
+            Seconds an entry may still be served as stale after it expires (0 disables)
+        max_bytes: int, optional
+            Approximate memory budget in bytes, or None for no byte limit
+        prefix_quotas: Dict[str, int], optional
+            Byte budgets reserved for specific key prefixes, e.g. {"jikan": 16_000_000}
+        negative_expiry: int
+            Default expiry time in seconds for negative entries
+        compress_threshold: int, optional
+            Serialized size in bytes from which values are compressed in memory, or None to never compress
+        hot_size: int
+            Number of compressed values kept decompressed for fast reads
         """
         self.expiry = expiry
         self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self.max_bytes = max_bytes
+        self.prefix_quotas = dict(prefix_quotas or {})
         self.cache = OrderedDict()  # {key: (value, expiry_timestamp)}
+        self.db = None
         
-    def get(self, key: str) -> Optional[Any]:
-        """Get a value from the cache if it exists and isn't expired"""
-        if key not in self.cache:
+        # Byte accounting: LRU order per pool, plus running totals
+        self.pools: Dict[str, OrderedDict] = {}  # {pool: OrderedDict{key: size}}
+        self.pool_bytes: Dict[str, int] = {}
+        self.prefix_bytes: Dict[str, int] = {}
+        self.total_bytes = 0
+        
+        # Expiry index: (expiry_timestamp, key). Entries are invalidated lazily,
+        # a heap entry only counts while it matches the key's current expiry.
+        self.expiry_heap: List[Tuple[float, str]] = []
+        self.expired_removed = 0
+        self.disk_size = 0
+        
+        # Negative entries, kept apart from real data: {key: (value, expiry_timestamp)}
+        self.negative_expiry = negative_expiry
+        self.negative = OrderedDict()
+        
+        self.metrics = CacheMetrics()
+        
+        # Compressed storage, with an LRU of decompressed values in front: {key: value}
+        self.compress_threshold = compress_threshold
+        self.hot_size = hot_size
+        self.hot = OrderedDict()
+        self.compressed_count = 0
+        self.compression_saved = 0  # Serialized bytes minus compressed bytes, over compressed entries
+        self.decompressions = 0
+        
+        if persist_path is not None:
+            self._open_disk_tier(persist_path)
+            
+    def _open_disk_tier(self, persist_path: Union[str, Path]) -> None:
+        """Open (or create) the SQLite file backing the disk tier"""
+        try:
+            self.db = sqlite3.connect(str(persist_path))
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)")
+            # Drop anything that went past its hard TTL while the bot was offline
+            self.db.execute("DELETE FROM cache WHERE expires < ?", (time.time() - self.stale_ttl,))
+            self.db.commit()
+            self.disk_size = self._disk_count()
+        except sqlite3.Error as e:
+            log.error(f"Could not open disk cache at {persist_path}, using memory only: {e}")
+            self.db = None
+            
+    def _disk_get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Look a key up in the disk tier and promote it to memory"""
+        if self.db is None:
+            return None
+            
+        try:
+            row = self.db.execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            log.error(f"Disk cache read failed: {e}")
+            return None
+            
+        if row is None:
             return None
             
-        value, expiry_time = self.cache[key]
+        raw_value, expiry_time = row
+        if self._is_dead(expiry_time, time.time()):
+            self._disk_delete([key])
+            self.metrics.record(key, "expirations")
+            return None
+            
+        value = loads(raw_value)
+        self._memory_set(key, value, expiry_time, raw_value)
+        self.metrics.record(key, "disk_hits")
+        return value, expiry_time
         
-        # Check if expired
-        if expiry_time < time.time():
-            self.delete(key)
+    def _disk_set(self, items: List[tuple]) -> None:
+        """
+        Write (key, value, expiry_timestamp, raw) rows to the disk tier
+        
+        raw is the serialized value from _memory_set, or None if it isn't JSON
+        serializable (kept in memory only).
+        """
+        if self.db is None:
+            return
+            
+        rows = [(key, raw, expiry_time) for key, value, expiry_time, raw in items if raw is not None]
+                
+        if not rows:
+            return
+            
+        try:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)", rows
+            )
+            self.db.commit()
+        except sqlite3.Error as e:
+            log.error(f"Disk cache write failed: {e}")
+            
+    def _disk_touch(self, key: str, expiry_time: float) -> None:
+        """Move a disk row's expiry without rewriting its value"""
+        if self.db is None:
+            return
+            
+        try:
+            self.db.execute("UPDATE cache SET expires = ? WHERE key = ?", (expiry_time, key))
+            self.db.commit()
+        except sqlite3.Error as e:
+            log.error(f"Disk cache write failed: {e}")
+            
+    def _disk_delete(self, keys: List[str]) -> None:
+        """Remove keys from the disk tier"""
+        if self.db is None or not keys:
+            return
+            
+        try:
+            self.db.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key in keys])
+            self.db.commit()
+        except sqlite3.Error as e:
+            log.error(f"Disk cache delete failed: {e}")
+            
+    def _pool_for(self, key: str) -> str:
+        """Byte pool a key is accounted against"""
+        prefix = key_prefix(key)
+        return prefix if prefix in self.prefix_quotas else SHARED_POOL
+        
+    def _pool_budget(self, pool: str) -> Optional[int]:
+        """Byte budget of a pool, or None if it is unbounded"""
+        if pool != SHARED_POOL:
+            return self.prefix_quotas[pool]
+        if self.max_bytes is None:
             return None
+        return max(0, self.max_bytes - sum(self.prefix_quotas.values()))
+        
+    def _pack(self, value: Any, raw: str = None) -> Tuple[Any, int, Optional[str]]:
+        """
+        Form a value is held in memory, its size in bytes and its serialized form
+        
+        raw is the value's serialized form if the caller already has it. The
+        returned form is None if the value isn't JSON serializable.
+        """
+        if raw is None:
+            try:
+                raw = dumps(value)
+            except (TypeError, ValueError):
+                return value, sys.getsizeof(value), None
+                
+        if self.compress_threshold is None or len(raw) < self.compress_threshold:
+            return value, len(raw), raw
             
-        # Move to end (most recently used)
-        self.cache.move_to_end(key)
+        data = raw.encode("utf-8")
+        blob = compress(data)
+        if len(blob) >= len(data):
+            return value, len(raw), raw
+        return CompressedValue(blob, len(data)), len(blob), raw
+        
+    def _unpack(self, key: str, stored: Any) -> Any:
+        """Value of a memory tier entry, decompressing through the hot set"""
+        if type(stored) is not CompressedValue:
+            return stored
+            
+        if key in self.hot:
+            self.hot.move_to_end(key)
+            return self.hot[key]
+            
+        value = stored.unpack()
+        self.decompressions += 1
+        self._hot_add(key, value)
         return value
         
+    def _hot_add(self, key: str, value: Any) -> None:
+        """Keep a decompressed value in the hot set, dropping the least recently read"""
+        self.hot[key] = value
+        self.hot.move_to_end(key)
+        if len(self.hot) > self.hot_size:
+            self.hot.popitem(last=False)
+            
+    def _memory_set(self, key: str, value: Any, expiry_time: float, raw: str = None) -> Optional[str]:
+        """
+        Store a value in the memory tier, evicting LRU items until it fits
+        
+        raw is the value's serialized form if the caller already has it (disk reads).
+        Returns the serialized form, so the disk write doesn't encode it again.
+        """
+        if key in self.cache:
+            self._memory_remove(key)
+            
+        stored, size, raw = self._pack(value, raw)
+        
+        # Without a byte budget, a count limit applies across the whole cache. With
+        # one, a global count cap would evict across pools and defeat the quotas.
+        if self.max_bytes is None and len(self.cache) >= self.max_size:
+            # Remove oldest (first) item; it stays available on disk
+            self._evict(next(iter(self.cache)))
+            
+        # Byte limit applies within the key's own pool
+        pool = self._pool_for(key)
+        budget = self._pool_budget(pool)
+        if budget is not None:
+            if size > budget:
+                # Would flush the entire pool; leave it on disk only
+                return raw
+            lru = self.pools.get(pool)
+            while lru and self.pool_bytes[pool] + size > budget:
+                self._evict(next(iter(lru)))
+                
+        # Add the item as most recently used
+        self.cache[key] = (stored, expiry_time)
+        if type(stored) is CompressedValue:
+            # Just written or read from disk, so likely to be read again soon
+            self._hot_add(key, value)
+            self.compressed_count += 1
+            self.compression_saved += stored.raw_size - size
+        self._index_expiry(key, expiry_time)
+        self.pools.setdefault(pool, OrderedDict())[key] = size
+        self.pool_bytes[pool] = self.pool_bytes.get(pool, 0) + size
+        prefix = key_prefix(key)
+        self.prefix_bytes[prefix] = self.prefix_bytes.get(prefix, 0) + size
+        self.total_bytes += size
+        self.metrics.add_bytes(key, size)
+        return raw
+        
+    def _memory_remove(self, key: str) -> None:
+        """Drop a key from the memory tier and its byte accounting"""
+        stored = self.cache.pop(key)[0]
+        pool = self._pool_for(key)
+        size = self.pools[pool].pop(key)
+        if type(stored) is CompressedValue:
+            self.hot.pop(key, None)
+            self.compressed_count -= 1
+            self.compression_saved -= stored.raw_size - size
+        self.pool_bytes[pool] -= size
+        self.prefix_bytes[key_prefix(key)] -= size
+        self.total_bytes -= size
+        self.metrics.add_bytes(key, -size)
+        
+    def _evict(self, key: str) -> None:
+        """Drop a key from the memory tier to make room, counting the eviction"""
+        self._memory_remove(key)
+        self.metrics.record(key, "evictions")
+        
+    def _index_expiry(self, key: str, expiry_time: float) -> None:
+        """Record a key's expiry in the heap, compacting it if too many entries are outdated"""
+        heapq.heappush(self.expiry_heap, (expiry_time, key))
+        
+        if len(self.expiry_heap) > 2 * len(self.cache) + 64:
+            self.expiry_heap = [(entry[1], key) for key, entry in self.cache.items()]
+            heapq.heapify(self.expiry_heap)
+            
+    def _is_current(self, key: str, expiry_time: float) -> bool:
+        """Whether a heap entry still describes a key in the memory tier"""
+        entry = self.cache.get(key)
+        return entry is not None and entry[1] == expiry_time
+        
+    def _mark_used(self, key: str) -> None:
+        """Move a key to the most recently used end of its LRU orders"""
+        self.cache.move_to_end(key)
+        self.pools[self._pool_for(key)].move_to_end(key)
+        
+    def close(self) -> None:
+        """Close the disk tier, if one is attached"""
+        if self.db is not None:
+            try:
+                self.db.close()
+            except sqlite3.Error:
+                pass
+            self.db = None
+        
+    def _is_dead(self, expiry_time: float, current_time: float) -> bool:
+        """Whether an entry is past its hard TTL and can no longer be served"""
+        return expiry_time + self.stale_ttl < current_time
+        
+    def _lookup(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Find a (value, expiry_timestamp) entry in memory or on disk, dropping dead ones"""
+        if key not in self.cache:
+            return self._disk_get(key)
+            
+        entry = self.cache[key]
+        if self._is_dead(entry[1], time.time()):
+            self.delete(key)
+            self.metrics.record(key, "expirations")
+            return None
+            
+        self._mark_used(key)
+        return entry
+        
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value from the cache if it exists and isn't expired"""
+        entry = self._lookup(key)
+        if entry is None or entry[1] < time.time():
+            self.metrics.record(key, "misses")
+            return None
+        self.metrics.record(key, "hits")
+        return self._unpack(key, entry[0])
+        
+    def get_stale(self, key: str, record: bool = True) -> Tuple[Optional[Any], bool]:
+        """
+        Get a value, also returning it if it expired but is within stale_ttl
+        
+        Pass record=False for internal reads that shouldn't count as hits or misses.
+        
+        Returns:
+        --------
+        Tuple[Optional[Any], bool]: (value or None, True if the value is stale)
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            if record:
+                self.metrics.record(key, "misses")
+            return None, False
+        is_stale = entry[1] < time.time()
+        if record:
+            self.metrics.record(key, "stale_hits" if is_stale else "hits")
+        return self._unpack(key, entry[0]), is_stale
+        
     def set(self, key: str, value: Any, expiry: int = None) -> None:
         """
         Add or update a value in the cache
@@ -59,15 +609,10 @@ class CacheManager:
         # Calculate expiry timestamp
         expiry_time = time.time() + expiry
         
-        # Check if we need to evict (only if adding new key)
-        if key not in self.cache and len(self.cache) >= self.max_size:
-            # Remove oldest (first) item
-            self.cache.popitem(last=False)
-            
-        # Add or update the item
-        self.cache[key] = (value, expiry_time)
-        # Move to end (most recently used)
-        self.cache.move_to_end(key)
+        # Real data supersedes any negative entry
+        self.negative.pop(key, None)
+        raw = self._memory_set(key, value, expiry_time)
+        self._disk_set([(key, value, expiry_time, raw)])
         
     def delete(self, key: str) -> bool:
         """
@@ -77,28 +622,146 @@ class CacheManager:
         --------
         bool: True if key was found and deleted, False otherwise
         """
+        self._disk_delete([key])
+        self.negative.pop(key, None)
         if key in self.cache:
-            del self.cache[key]
+            self._memory_remove(key)
             return True
         return False
         
     def clear(self) -> None:
         """Clear all items from the cache"""
         self.cache.clear()
+        self.pools.clear()
+        self.pool_bytes.clear()
+        self.prefix_bytes.clear()
+        self.total_bytes = 0
+        self.metrics.bytes.clear()
+        self.hot.clear()
+        self.compressed_count = 0
+        self.compression_saved = 0
+        self.expiry_heap.clear()
+        self.negative.clear()
+        
+        if self.db is not None:
+            try:
+                self.db.execute("DELETE FROM cache")
+                self.db.commit()
+            except sqlite3.Error as e:
+                log.error(f"Disk cache clear failed: {e}")
+        
+    def set_negative(self, key: str, value: Any = None, expiry: int = None) -> None:
+        """
+        Remember that a lookup came back empty or not found
+        
+        Parameters:
+        -----------
+        key: str
+            Cache key of the lookup
+        value: Any, optional
+            Small value to hand back on a hit (e.g. an empty result), or None
+        expiry: int, optional
+            Custom expiry time in seconds, or None for negative_expiry
+        """
+        if expiry is None:
+            expiry = self.negative_expiry
+            
+        if key not in self.negative and len(self.negative) >= self.max_size:
+            self.negative.popitem(last=False)
+            
+        self.negative[key] = (value, time.time() + expiry)
+        self.negative.move_to_end(key)
         
-    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+    def get_negative(self, key: str) -> Tuple[bool, Any]:
+        """
+        Check for an unexpired negative entry
+        
+        Returns:
+        --------
+        Tuple[bool, Any]: (True if there is one, the value stored with it)
+        """
+        entry = self.negative.get(key)
+        if entry is None:
+            return False, None
+            
+        value, expiry_time = entry
+        if expiry_time < time.time():
+            del self.negative[key]
+            return False, None
+            
+        return True, value
+        
+    def get_many(self, keys: List[str], record: bool = True) -> Dict[str, Any]:
         """
         Get multiple values from the cache at once
         
+        With record=False no hits or misses are counted; the caller records
+        the lookups that served it.
+        
         Returns:
         --------
         Dict[str, Any]: Dictionary of {key: value} for all valid keys
         """
         result = {}
+        missing = []
+        current_time = time.time()
+        
         for key in keys:
-            value = self.get(key)
-            if value is not None:
-                result[key] = value
+            if key not in self.cache:
+                missing.append(key)
+                continue
+            value, expiry_time = self.cache[key]
+            if expiry_time < current_time:
+                if self._is_dead(expiry_time, current_time):
+                    self.delete(key)
+                    self.metrics.record(key, "expirations")
+                if record:
+                    self.metrics.record(key, "misses")
+                continue
+            self._mark_used(key)
+            if record:
+                self.metrics.record(key, "hits")
+            result[key] = self._unpack(key, value)
+            
+        if missing and self.db is not None:
+            result.update(self._disk_get_many(missing))
+            
+        if record:
+            for key in missing:
+                self.metrics.record(key, "hits" if key in result else "misses")
+            
+        return result
+        
+    def _disk_get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Batch lookup of several keys in the disk tier"""
+        result = {}
+        current_time = time.time()
+        expired = []
+        
+        # Stay well under SQLite's bound parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            try:
+                rows = self.db.execute(
+                    f"SELECT key, value, expires FROM cache WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+            except sqlite3.Error as e:
+                log.error(f"Disk cache read failed: {e}")
+                continue
+                
+            for key, raw_value, expiry_time in rows:
+                if self._is_dead(expiry_time, current_time):
+                    expired.append(key)
+                    self.metrics.record(key, "expirations")
+                    continue
+                value = loads(raw_value)
+                self._memory_set(key, value, expiry_time, raw_value)
+                if expiry_time >= current_time:
+                    self.metrics.record(key, "disk_hits")
+                    result[key] = value
+                
+        self._disk_delete(expired)
         return result
         
     def set_many(self, values: Dict[str, Any], expiry: int = None) -> None:
@@ -112,46 +775,115 @@ class CacheManager:
         expiry: int, optional
             Custom expiry time in seconds, or None for default
         """
+        if expiry is None:
+            expiry = self.expiry
+            
+        expiry_time = time.time() + expiry
+        rows = []
         for key, value in values.items():
-            self.set(key, value, expiry)
+            self.negative.pop(key, None)
+            rows.append((key, value, expiry_time, self._memory_set(key, value, expiry_time)))
+            
+        # Single transaction for the whole batch
+        self._disk_set(rows)
             
     def clean_expired(self) -> int:
         """
         Remove all expired items from the cache
         
+        Items still inside the stale window are kept. Only expired entries
+        are visited, via the expiry heap.
+        
         Returns:
         --------
         int: Number of items removed
         """
         current_time = time.time()
-        keys_to_delete = []
+        removed = 0
         
-        # Find expired keys
-        for key, (_, expiry_time) in self.cache.items():
-            if expiry_time < current_time:
-                keys_to_delete.append(key)
+        # Pop expired entries off the heap, skipping outdated ones
+        while self.expiry_heap and self._is_dead(self.expiry_heap[0][0], current_time):
+            expiry_time, key = heapq.heappop(self.expiry_heap)
+            if self._is_current(key, expiry_time):
+                self._memory_remove(key)
+                self.metrics.record(key, "expirations")
+                removed += 1
                 
-        # Delete expired keys
-        for key in keys_to_delete:
-            self.delete(key)
-            
-        return len(keys_to_delete)
+        # The negative store is small and bounded, so a full pass is cheap
+        for key in [key for key, (_, expiry_time) in self.negative.items() if expiry_time < current_time]:
+            del self.negative[key]
+        
+        if self.db is not None:
+            try:
+                self.db.execute("DELETE FROM cache WHERE expires < ?", (current_time - self.stale_ttl,))
+                self.db.commit()
+            except sqlite3.Error as e:
+                log.error(f"Disk cache cleanup failed: {e}")
+                
+        self.expired_removed += removed
+        return removed
+        
+    async def sweeper(self, interval: int = 60):
+        """
+        Background task that purges expired items every interval seconds
+        
+        Parameters:
+        -----------
+        interval: int
+            Seconds between sweeps
+        """
+        while True:
+            try:
+                removed = self.clean_expired()
+                self.disk_size = self._disk_count()
+                if removed:
+                    log.debug(f"Cache sweep removed {removed} expired items")
+            except Exception as e:
+                log.error(f"Error in cache sweeper: {e}")
+                
+            await asyncio.sleep(interval)
         
     def get_stats(self) -> Dict[str, Any]:
         """
         Get cache statistics
         
+        This does not modify the cache; disk_size is as of the last sweep.
+        
         Returns:
         --------
         Dict[str, Any]: Dictionary with cache statistics
         """
         return {
             "size": len(self.cache),
+            "disk_size": self.disk_size,
             "max_size": self.max_size,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "bytes_by_prefix": {prefix: size for prefix, size in self.prefix_bytes.items() if size},
+            "prefix_quotas": dict(self.prefix_quotas),
             "default_expiry": self.expiry,
-            "expired_items": self.clean_expired()
+            "stale_ttl": self.stale_ttl,
+            "expired_removed": self.expired_removed,
+            "negative_entries": len(self.negative),
+            "negative_expiry": self.negative_expiry,
+            "index_size": len(self.expiry_heap),
+            "hit_ratio": self.metrics.hit_ratio(),
+            "compressed": self.compressed_count,
+            "compression_saved": self.compression_saved,
+            "compression": "lz4" if lz4_frame is not None else "zlib",
+            "hot_entries": len(self.hot),
+            "decompressions": self.decompressions
         }
     
+    def _disk_count(self) -> int:
+        """Number of rows in the disk tier (0 if there is none)"""
+        if self.db is None:
+            return 0
+        try:
+            return self.db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+    
     def exists(self, key: str) -> bool:
         """
         Check if a key exists in the cache and is not expired
@@ -160,17 +892,8 @@ class CacheManager:
         --------
         bool: True if the key exists and is not expired
         """
-        if key not in self.cache:
-            return False
-            
-        _, expiry_time = self.cache[key]
-        
-        # Check if expired
-        if expiry_time < time.time():
-            self.delete(key)
-            return False
-            
-        return True
+        entry = self._lookup(key)
+        return entry is not None and entry[1] >= time.time()
         
     def touch(self, key: str, expiry: int = None) -> bool:
         """
@@ -187,11 +910,10 @@ class CacheManager:
         --------
         bool: True if the key exists and expiry was updated
         """
-        if key not in self.cache:
+        entry = self._lookup(key)
+        if entry is None:
             return False
             
-        value, _ = self.cache[key]
-        
         # Use default expiry if none provided
         if expiry is None:
             expiry = self.expiry
@@ -199,11 +921,11 @@ class CacheManager:
         # Calculate new expiry timestamp
         expiry_time = time.time() + expiry
         
-        # Update the expiry time
-        self.cache[key] = (value, expiry_time)
-        
-        # Move to end (most recently used)
-        self.cache.move_to_end(key)
+        # Update the expiry time (the lookup already marked it as recently used)
+        if key in self.cache:
+            self.cache[key] = (self.cache[key][0], expiry_time)
+            self._index_expiry(key, expiry_time)
+        self._disk_touch(key, expiry_time)
         
         return True
         
@@ -213,13 +935,12 @@ class CacheManager:
         
         Returns:
         --------
-        List[str]: List of all keys in the cache
+        List[str]: List of all unexpired keys in the cache
         """
-        # Clean expired items first
-        self.clean_expired()
-        
-        # Return all remaining keys
-        return list(self.cache.keys())
+        expired = set(self.get_expired_keys())
+        if not expired:
+            return list(self.cache.keys())
+        return [key for key in self.cache if key not in expired]
         
     def get_expired_keys(self) -> List[str]:
         """
@@ -232,8 +953,17 @@ class CacheManager:
         current_time = time.time()
         expired_keys = []
         
-        for key, (_, expiry_time) in self.cache.items():
-            if expiry_time < current_time:
+        # Walk only the part of the heap that is already expired: a node's
+        # children can't expire earlier than the node itself
+        heap = self.expiry_heap
+        pending = [0] if heap else []
+        while pending:
+            index = pending.pop()
+            expiry_time, key = heap[index]
+            if expiry_time >= current_time:
+                continue
+            if self._is_current(key, expiry_time):
                 expired_keys.append(key)
+            pending.extend(child for child in (2 * index + 1, 2 * index + 2) if child < len(heap))
                 
         return expired_keys
@@ -0,0 +1,488 @@
+import re
+import json
+import bisect
+import logging
+import sqlite3
+import unicodedata
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Set, Union
+from collections import OrderedDict
+
+log = logging.getLogger("red.animeforum.catalog")
+
+# Fields kept for every catalog entry, enough to answer a search
+ENTRY_FIELDS = ("id", "title", "title_english", "title_japanese", "synonyms",
+                "type", "episodes", "score", "aired", "image_url", "url")
+
+
+def normalize_title(text: str) -> str:
+    """Lowercase a title and reduce it to words separated by single spaces"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return " ".join(re.findall(r"\w+", text))
+
+
+def title_terms(text: str) -> List[str]:
+    """
+    Split a normalized title into index terms
+
+    Latin words are used as they are. Japanese and other non-ASCII words are
+    rarely separated by spaces, so they are indexed as character bigrams.
+    """
+    terms = []
+    for word in text.split():
+        if word.isascii() or len(word) < 3:
+            terms.append(word)
+        else:
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def query_matches(query_terms: List[str], terms: Set[str]) -> bool:
+    """
+    Whether a title's index terms contain every query term
+
+    The last query term may be a prefix, since it may still be being typed.
+    """
+    if not query_terms:
+        return True
+    *complete, last = query_terms
+    return all(term in terms for term in complete) and any(term.startswith(last) for term in terms)
+
+
+def trigrams(text: str) -> Set[str]:
+    """Character trigrams of a normalized title, padded so word edges count"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Words that tell sequels apart, which a fuzzy match must not ignore
+ROMAN_NUMERALS = {"ii", "iii", "iv", "v", "vi", "vii", "viii", "ix", "x"}
+
+
+def sequel_markers(text: str) -> Set[str]:
+    """Numbers and roman numerals in a normalized title"""
+    return {word for word in text.split() if word.isdigit() or word in ROMAN_NUMERALS}
+
+
+def edit_similarity(a: str, b: str) -> float:
+    """1 minus the Levenshtein distance divided by the longer length"""
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return 1 - previous[-1] / max(len(a), len(b))
+
+
+class TitleMatcher:
+    """
+    Maps free-form names (forum channel names, typed titles) to anime IDs
+
+    Names are reduced to their normalized form, so "fullmetal-alchemist-brotherhood"
+    and "Fullmetal Alchemist: Brotherhood" are the same key. Exact keys are
+    looked up directly; otherwise candidates sharing enough trigrams are
+    verified by edit distance; both must carry the same sequel numbers, so
+    "Overlord II" never matches "Overlord III". Forum names linked to an anime
+    outrank titles.
+    """
+
+    def __init__(self, min_similarity: float = 0.8, candidate_overlap: float = 0.5):
+        """
+        Initialize the matcher
+
+        Parameters:
+        -----------
+        min_similarity: float
+            Edit similarity (0-1) a fuzzy match needs to be accepted
+        candidate_overlap: float
+            Share of the name's trigrams a title needs to be considered
+        """
+        self.min_similarity = min_similarity
+        self.candidate_overlap = candidate_overlap
+        self.keys: Dict[str, Set[int]] = {}  # {normalized title: {anime_id}}
+        self.slugs: Dict[str, int] = {}  # {normalized forum name: anime_id}
+        self.grams: Dict[str, Set[str]] = {}  # {trigram: {normalized title}}
+        self.memo: Dict[str, Optional[int]] = {}  # Cleared whenever the index changes
+
+    def add(self, anime_id: int, titles: Set[str]) -> None:
+        """Index normalized titles for an anime"""
+        for title in titles:
+            ids = self.keys.setdefault(title, set())
+            if not ids:
+                for gram in trigrams(title):
+                    self.grams.setdefault(gram, set()).add(title)
+            ids.add(anime_id)
+        self.memo.clear()
+
+    def remove(self, anime_id: int, titles: Set[str]) -> None:
+        """Drop an anime from the given normalized titles"""
+        for title in titles:
+            ids = self.keys.get(title)
+            if ids is None:
+                continue
+            ids.discard(anime_id)
+            if not ids:
+                del self.keys[title]
+                for gram in trigrams(title):
+                    self.grams[gram].discard(title)
+                    if not self.grams[gram]:
+                        del self.grams[gram]
+        self.memo.clear()
+
+    def link(self, name: str, anime_id: int) -> None:
+        """Remember that a forum name belongs to an anime"""
+        name = normalize_title(name)
+        if name:
+            self.slugs[name] = anime_id
+            self.memo.clear()
+
+    def match(self, name: str, rank=None) -> Optional[int]:
+        """
+        Find the anime a name refers to
+
+        Parameters:
+        -----------
+        name: str
+            Channel name or title
+        rank: callable, optional
+            Sort key used to pick between several anime sharing a title
+
+        Returns:
+        --------
+        Optional[int]: The anime ID, or None if nothing is close enough
+        """
+        name = normalize_title(name)
+        if not name:
+            return None
+        if name in self.memo:
+            return self.memo[name]
+        if len(self.memo) >= 10000:
+            self.memo.clear()
+
+        anime_id = self.slugs.get(name)
+        if anime_id is None:
+            title = name if name in self.keys else self._closest(name)
+            if title is not None:
+                anime_id = min(self.keys[title], key=rank) if rank else min(self.keys[title])
+
+        self.memo[name] = anime_id
+        return anime_id
+
+    def _closest(self, name: str) -> Optional[str]:
+        """Closest indexed title by trigram overlap and edit distance"""
+        name_grams = trigrams(name)
+        overlap: Dict[str, int] = {}
+        for gram in name_grams:
+            for title in self.grams.get(gram, ()):
+                overlap[title] = overlap.get(title, 0) + 1
+
+        needed = self.candidate_overlap * len(name_grams)
+        candidates = sorted(
+            (title for title, shared in overlap.items() if shared >= needed),
+            key=lambda title: -overlap[title]
+        )[:20]
+
+        markers = sequel_markers(name)
+        best, best_similarity = None, self.min_similarity
+        for title in candidates:
+            if sequel_markers(title) != markers:
+                continue
+            similarity = edit_similarity(name, title)
+            if similarity >= best_similarity:
+                best, best_similarity = title, similarity
+        return best
+
+
+class AnimeCatalog:
+    """
+    Local catalog of anime already fetched from the APIs, searchable by title
+
+    Entries come from search results, details lookups and season/top listings.
+    An in-process inverted index maps every term of the English, Japanese,
+    romaji and alternative titles to anime IDs, so most title lookups are
+    answered without a network round trip.
+
+    search() only answers when it is confident: the query was resolved over
+    the network before, or it is exactly one of an entry's titles. Anything
+    else returns None so the caller asks the API (and adds the results).
+
+    A TitleMatcher over the same titles, plus the names of forums created for
+    an anime, resolves channel names to anime IDs (match()).
+
+    Entries are kept in an optional SQLite file and the index is rebuilt
+    from it on load.
+    """
+
+    def __init__(self, persist_path: Union[str, Path] = None, max_queries: int = 5000):
+        """
+        Initialize the catalog
+
+        Parameters:
+        -----------
+        persist_path: str or Path, optional
+            SQLite file the entries are stored in, or None for memory only
+        max_queries: int
+            Maximum number of resolved search queries to remember
+        """
+        self.entries: Dict[int, Dict[str, Any]] = {}
+        self.index: Dict[str, Set[int]] = {}  # {term: {anime_id}}
+        self.titles: Dict[str, Set[int]] = {}  # {normalized title: {anime_id}}
+        self.entry_terms: Dict[int, Set[str]] = {}
+        self.entry_titles: Dict[int, Set[str]] = {}
+        self.sorted_terms: List[str] = []  # For prefix matching, rebuilt lazily
+        self.terms_dirty = False
+        self.matcher = TitleMatcher()
+
+        # Queries resolved over the network: {normalized query: (anime_ids, limit)}
+        self.max_queries = max_queries
+        self.queries = OrderedDict()
+
+        self.stats = {"hits": 0, "misses": 0}
+        self.db = None
+
+        if persist_path is not None:
+            self._open_db(persist_path)
+
+    def _open_db(self, persist_path: Union[str, Path]) -> None:
+        """Open (or create) the SQLite file and load the stored entries"""
+        try:
+            self.db = sqlite3.connect(str(persist_path))
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS catalog (id INTEGER PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS forum_links (name TEXT PRIMARY KEY, id INTEGER NOT NULL)"
+            )
+            self.db.commit()
+            for (data,) in self.db.execute("SELECT data FROM catalog"):
+                self._index_entry(json.loads(data))
+            for name, anime_id in self.db.execute("SELECT name, id FROM forum_links"):
+                self.matcher.link(name, anime_id)
+        except (sqlite3.Error, ValueError) as e:
+            log.error(f"Could not open anime catalog at {persist_path}, using memory only: {e}")
+            self.db = None
+
+    def _entry_titles(self, entry: Dict[str, Any]) -> Set[str]:
+        """Every normalized title of an entry"""
+        names = [entry.get("title"), entry.get("title_english"), entry.get("title_japanese")]
+        names.extend(entry.get("synonyms") or [])
+        return {title for title in map(normalize_title, names) if title}
+
+    def _index_entry(self, entry: Dict[str, Any]) -> None:
+        """Add an entry to the in-memory index, replacing any older version"""
+        anime_id = entry["id"]
+        self._unindex(anime_id)
+
+        titles = self._entry_titles(entry)
+        terms = {term for title in titles for term in title_terms(title)}
+
+        for title in titles:
+            self.titles.setdefault(title, set()).add(anime_id)
+        self.matcher.add(anime_id, titles)
+        for term in terms:
+            postings = self.index.setdefault(term, set())
+            if not postings:
+                self.terms_dirty = True
+            postings.add(anime_id)
+
+        self.entries[anime_id] = entry
+        self.entry_titles[anime_id] = titles
+        self.entry_terms[anime_id] = terms
+
+    def _unindex(self, anime_id: int) -> None:
+        """Remove an entry's titles and terms from the index"""
+        self.matcher.remove(anime_id, self.entry_titles.get(anime_id, set()))
+        for title in self.entry_titles.pop(anime_id, ()):
+            self.titles[title].discard(anime_id)
+            if not self.titles[title]:
+                del self.titles[title]
+        for term in self.entry_terms.pop(anime_id, ()):
+            self.index[term].discard(anime_id)
+            if not self.index[term]:
+                del self.index[term]
+                self.terms_dirty = True
+
+    def add_many(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Add or update entries
+
+        Parameters:
+        -----------
+        entries: List[Dict[str, Any]]
+            Dicts with an "id" and any of ENTRY_FIELDS; missing fields keep
+            the value of the existing entry
+        """
+        changed = []
+        for entry in entries:
+            if not entry or not entry.get("id"):
+                continue
+            merged = dict(self.entries.get(entry["id"], {}))
+            merged.update({field: entry[field] for field in ENTRY_FIELDS if entry.get(field) is not None})
+            if merged != self.entries.get(entry["id"]):
+                self._index_entry(merged)
+                changed.append(merged)
+
+        if changed and self.db is not None:
+            try:
+                with self.db:
+                    self.db.executemany(
+                        "INSERT OR REPLACE INTO catalog (id, data) VALUES (?, ?)",
+                        [(entry["id"], json.dumps(entry)) for entry in changed]
+                    )
+            except sqlite3.Error as e:
+                log.error(f"Catalog write failed: {e}")
+
+    def add_search(self, query: str, limit: int, entries: List[Dict[str, Any]]) -> None:
+        """Add the results of a network search and remember their order for the query"""
+        self.add_many(entries)
+        query = normalize_title(query)
+        if not query:
+            return
+        self.queries[query] = ([entry["id"] for entry in entries if entry.get("id")], limit)
+        self.queries.move_to_end(query)
+        while len(self.queries) > self.max_queries:
+            self.queries.popitem(last=False)
+
+    def _result(self, anime_id: int) -> Dict[str, Any]:
+        """Copy of an entry shaped like an API search result"""
+        entry = dict(self.entries[anime_id])
+        entry["mal_id"] = anime_id
+        return entry
+
+    def _candidates(self, query: str) -> Set[int]:
+        """IDs of entries containing every query term (the last one may be a prefix)"""
+        terms = title_terms(query)
+        if not terms:
+            return set()
+
+        candidates = None
+        for term in terms[:-1]:
+            postings = self.index.get(term, set())
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return set()
+
+        # The last term may still be being typed, so match it as a prefix
+        if self.terms_dirty:
+            self.sorted_terms = sorted(self.index)
+            self.terms_dirty = False
+        last = terms[-1]
+        matches = set()
+        start = bisect.bisect_left(self.sorted_terms, last)
+        for term in self.sorted_terms[start:]:
+            if not term.startswith(last):
+                break
+            matches |= self.index[term]
+
+        return matches if candidates is None else candidates & matches
+
+    def _rank(self, query: str, anime_ids: Set[int]) -> List[int]:
+        """Order IDs by how closely one of their titles matches the query"""
+        def sort_key(anime_id):
+            titles = self.entry_titles[anime_id]
+            exact = query in titles
+            prefix = any(title.startswith(query) for title in titles)
+            shortest = min((len(title) for title in titles), default=0)
+            score = self.entries[anime_id].get("score") or 0
+            return (not exact, not prefix, shortest, -score)
+        return sorted(anime_ids, key=sort_key)
+
+    def search(self, query: str, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """
+        Search the catalog by title
+
+        Parameters:
+        -----------
+        query: str
+            Title or part of a title in any language
+        limit: int
+            Maximum number of results
+
+        Returns:
+        --------
+        Optional[List[Dict[str, Any]]]: Matching entries, or None when the
+        catalog can't answer confidently and the API should be asked
+        """
+        query = normalize_title(query)
+        if not query:
+            return None
+
+        # A query resolved over the network before, with a large enough limit
+        if query in self.queries:
+            anime_ids, resolved_limit = self.queries[query]
+            if (limit <= resolved_limit or len(anime_ids) < resolved_limit) and \
+                    all(anime_id in self.entries for anime_id in anime_ids):
+                self.queries.move_to_end(query)
+                self.stats["hits"] += 1
+                return [self._result(anime_id) for anime_id in anime_ids[:limit]]
+
+        # Otherwise only answer if the query is exactly one of the titles
+        if query in self.titles:
+            ranked = self._rank(query, self._candidates(query) | self.titles[query])
+            self.stats["hits"] += 1
+            return [self._result(anime_id) for anime_id in ranked[:limit]]
+
+        self.stats["misses"] += 1
+        return None
+
+    def match(self, name: str) -> Optional[int]:
+        """
+        Resolve a forum channel name or title to an anime ID without the API
+
+        Exact normalized titles and linked forum names are found directly,
+        near misses by trigram overlap and edit distance. When several anime
+        share a title, the highest scored one wins.
+        """
+        return self.matcher.match(name, rank=lambda anime_id: -(self.entries[anime_id].get("score") or 0))
+
+    def link_forum(self, name: str, anime_id: int) -> None:
+        """Remember the anime a forum channel was created for"""
+        self.matcher.link(name, anime_id)
+        if self.db is not None:
+            try:
+                with self.db:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO forum_links (name, id) VALUES (?, ?)",
+                        (normalize_title(name), anime_id)
+                    )
+            except sqlite3.Error as e:
+                log.error(f"Catalog write failed: {e}")
+
+    def get(self, anime_id: int) -> Optional[Dict[str, Any]]:
+        """Get a catalog entry by ID"""
+        return self._result(anime_id) if anime_id in self.entries else None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get catalog statistics
+
+        Returns:
+        --------
+        Dict[str, Any]: Entry, term and query counts plus search hits/misses
+        """
+        return {
+            "entries": len(self.entries),
+            "terms": len(self.index),
+            "queries": len(self.queries),
+            "forum_links": len(self.matcher.slugs),
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"]
+        }
+
+    def close(self) -> None:
+        """Close the SQLite file"""
+        if self.db is not None:
+            try:
+                self.db.close()
+            except sqlite3.Error as e:
+                log.error(f"Error closing anime catalog: {e}")
+            self.db = None
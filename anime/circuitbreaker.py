@@ -0,0 +1,191 @@
+import time
+import random
+import logging
+from collections import deque
+from typing import Dict, Any
+
+log = logging.getLogger("red.animeforum.circuit_breaker")
+
+STATE_CLOSED = "closed"        # Requests flow normally
+STATE_OPEN = "open"            # Upstream considered down, requests fail fast
+STATE_HALF_OPEN = "half_open"  # One probe request decides whether to close again
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one upstream API
+
+    After `failure_threshold` consecutive failures (5xx responses, timeouts,
+    connection errors) the circuit opens and requests are refused locally.
+    Once the open period is over a single probe request is let through: if it
+    succeeds the circuit closes, if it fails the circuit opens again for twice
+    as long (with jitter), up to max_reset_timeout.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 15.0,
+                 max_reset_timeout: float = 300.0):
+        """
+        Initialize circuit breaker
+
+        Parameters:
+        -----------
+        name: str
+            Name of the upstream, used in logs and stats
+        failure_threshold: int
+            Consecutive failures that open the circuit
+        reset_timeout: float
+            Seconds the circuit stays open the first time
+        max_reset_timeout: float
+            Upper bound for the open period after repeated failed probes
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+
+        self.state = STATE_CLOSED
+        self.failures = 0      # Consecutive failures while closed
+        self.trips = 0         # Consecutive times the circuit opened
+        self.open_until = 0.0  # Monotonic time the open period ends
+        self.probing = False   # Whether the half-open probe is in flight
+        self.stats = {"opened": 0, "rejected": 0}
+
+    def is_open(self) -> bool:
+        """Whether requests would currently be refused"""
+        return self.state == STATE_OPEN and time.monotonic() < self.open_until
+
+    def allow(self) -> bool:
+        """
+        Check whether a request may be sent
+
+        Every allowed request must be followed by record_success(),
+        record_failure() or release().
+        """
+        if self.state == STATE_OPEN:
+            if time.monotonic() < self.open_until:
+                self.stats["rejected"] += 1
+                return False
+            self.state = STATE_HALF_OPEN
+            self.probing = False
+
+        if self.state == STATE_HALF_OPEN:
+            if self.probing:
+                self.stats["rejected"] += 1
+                return False
+            self.probing = True
+
+        return True
+
+    def record_success(self) -> None:
+        """The upstream answered; close the circuit"""
+        if self.state != STATE_CLOSED:
+            log.info(f"{self.name} circuit closed, upstream is responding again")
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.probing = False
+
+    def record_failure(self) -> None:
+        """The upstream failed; open the circuit if it keeps failing"""
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or self.failures >= self.failure_threshold:
+            self._trip()
+
+    def release(self) -> None:
+        """An allowed request ended without telling anything about the upstream"""
+        self.probing = False
+
+    def _trip(self) -> None:
+        """Open the circuit, backing off further after each failed probe"""
+        self.trips += 1
+        timeout = min(self.max_reset_timeout, self.reset_timeout * 2 ** (self.trips - 1))
+        timeout *= random.uniform(0.8, 1.2)  # So several bots don't probe in lockstep
+
+        self.state = STATE_OPEN
+        self.open_until = time.monotonic() + timeout
+        self.failures = 0
+        self.probing = False
+        self.stats["opened"] += 1
+        log.warning(f"{self.name} circuit opened, failing fast for {timeout:.1f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get circuit breaker statistics
+
+        Returns:
+        --------
+        Dict[str, Any]: Current state, seconds until a probe and open/reject counts
+        """
+        state = self.state
+        if state == STATE_OPEN and time.monotonic() >= self.open_until:
+            state = STATE_HALF_OPEN  # Next request will probe
+        return {
+            "state": state,
+            "open_for": round(max(0.0, self.open_until - time.monotonic()), 1) if state == STATE_OPEN else 0.0,
+            "failures": self.failures,
+            "opened": self.stats["opened"],
+            "rejected": self.stats["rejected"]
+        }
+
+
+class RetryBudget:
+    """
+    Caps retries to a share of recent requests
+
+    Retrying helps with a blip but multiplies load during an outage. A retry
+    is only allowed while retries in the last `window` seconds stay below
+    `min_retries` plus `ratio` times the requests in that window.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 3, window: float = 60.0):
+        """
+        Initialize retry budget
+
+        Parameters:
+        -----------
+        ratio: float
+            Retries allowed per request sent
+        min_retries: int
+            Retries always allowed per window, so quiet periods can retry too
+        window: float
+            Seconds of history the budget looks at
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self.requests = deque()  # Monotonic timestamps
+        self.retries = deque()
+        self.denied = 0
+
+    def _prune(self, now: float) -> None:
+        """Forget requests and retries older than the window"""
+        for timestamps in (self.requests, self.retries):
+            while timestamps and timestamps[0] < now - self.window:
+                timestamps.popleft()
+
+    def record_request(self) -> None:
+        """Count a new (non-retry) request"""
+        now = time.monotonic()
+        self._prune(now)
+        self.requests.append(now)
+
+    def try_retry(self) -> bool:
+        """Use a retry from the budget, returning False if none is left"""
+        now = time.monotonic()
+        self._prune(now)
+        if len(self.retries) >= self.min_retries + self.ratio * len(self.requests):
+            self.denied += 1
+            return False
+        self.retries.append(now)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get retry budget statistics
+
+        Returns:
+        --------
+        Dict[str, Any]: Requests and retries in the window, and retries denied
+        """
+        self._prune(time.monotonic())
+        return {"requests": len(self.requests), "retries": len(self.retries), "denied": self.denied}
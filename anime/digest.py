@@ -0,0 +1,146 @@
+import asyncio
+import discord
+import logging
+from datetime import datetime
+from typing import Dict, List, Any
+
+from redbot.core import Config
+from redbot.core.bot import Red
+
+from .malapi import MyAnimeListAPI, WEEKDAYS
+from .ratelimiter import RateLimiter, PRIORITY_BACKGROUND
+from .records import AnimeRecord
+from .watchlists import WatchlistStore
+
+log = logging.getLogger("red.animeforum.digest")
+
+
+def join_schedule(airing: List[AnimeRecord], watchlists: WatchlistStore) -> Dict[int, List[AnimeRecord]]:
+    """
+    Match the anime airing on a day against every watchlist
+
+    Walks the distinct airing anime once per guild and reads their watchers
+    from the reverse index, so the cost follows the number of airing anime,
+    not the number of users. A user who watches an anime in several guilds
+    gets it once.
+
+    Returns:
+    --------
+    Dict[int, List[AnimeRecord]]: {user_id: anime airing for them}, in schedule order
+    """
+    digests: Dict[int, Dict[int, AnimeRecord]] = {}
+    for guild_id in watchlists.guild_ids():
+        watched = watchlists.watched_anime(guild_id)
+        for anime in airing:
+            for user_id in watched.get(anime.id, ()):
+                digests.setdefault(user_id, {})[anime.id] = anime
+    return {user_id: list(anime.values()) for user_id, anime in digests.items()}
+
+
+class AiringDigest:
+    """
+    Daily direct message listing the watchlist anime airing that day
+
+    The day's schedule comes from the week snapshot (no request per user),
+    is joined against the watchlist index, and each user who turned the
+    digest on gets one message with all of their anime. Messages go out
+    through a rate limiter so a large guild doesn't run into Discord's limits.
+    """
+
+    def __init__(self, bot: Red, config: Config, mal_api: MyAnimeListAPI, watchlists: WatchlistStore):
+        self.bot = bot
+        self.config = config
+        self.mal_api = mal_api
+        self.watchlists = watchlists
+
+        # Register additional configs
+        self.config.register_global(digest_hour=9, digest_last_sent=None)
+        self.config.register_user(digest_enabled=False)  # Opt-in with .watchlist digest on
+
+        # Discord doesn't publish DM limits, so stay well below what it tolerates
+        self.rate_limiter = RateLimiter("digest", [(1, 1.0), (30, 60.0)])
+        self.stats = {"runs": 0, "sent": 0, "failed": 0, "not_enabled": 0}
+
+    async def digest_sender(self, check_interval: int = 900):
+        """Background task that sends the digest once a day after digest_hour (local time)"""
+        await self.bot.wait_until_ready()
+
+        while True:
+            try:
+                now = datetime.now()
+                today = now.date().isoformat()
+                if now.hour >= await self.config.digest_hour() and await self.config.digest_last_sent() != today:
+                    # Mark first, so a crash half way doesn't send everything twice
+                    await self.config.digest_last_sent.set(today)
+                    await self.send_digests()
+            except Exception as e:
+                log.error(f"Error sending airing digest: {e}")
+
+            await asyncio.sleep(check_interval)
+
+    async def send_digests(self, weekday: str = None) -> Dict[str, int]:
+        """
+        Build and deliver the digest for a weekday (defaults to today)
+
+        Returns:
+        --------
+        Dict[str, int]: Airing anime, users with a digest, messages sent and failed
+        """
+        day = weekday.capitalize() if weekday else WEEKDAYS[datetime.now().weekday()]
+        schedule = await self.mal_api.get_anime_schedule(day, PRIORITY_BACKGROUND)
+        airing = schedule.get(day, [])
+
+        digests = join_schedule(airing, self.watchlists) if airing else {}
+        self.stats["runs"] += 1
+        result = {"airing": len(airing), "users": len(digests), "sent": 0, "failed": 0}
+        if not digests:
+            return result
+
+        # One read for every user's preference instead of one per user
+        preferences = await self.config.all_users()
+        for user_id, anime in digests.items():
+            if not preferences.get(user_id, {}).get("digest_enabled", False):
+                self.stats["not_enabled"] += 1
+                continue
+
+            await self.rate_limiter.acquire(PRIORITY_BACKGROUND)
+            if await self._send_digest(user_id, day, anime):
+                result["sent"] += 1
+            else:
+                result["failed"] += 1
+
+        self.stats["sent"] += result["sent"]
+        self.stats["failed"] += result["failed"]
+        log.info(f"Airing digest for {day}: {result}")
+        return result
+
+    async def _send_digest(self, user_id: int, day: str, anime: List[AnimeRecord]) -> bool:
+        """DM one user their digest, returning False if it couldn't be delivered"""
+        user = self.bot.get_user(user_id)
+        if user is None:
+            return False
+
+        embed = discord.Embed(
+            title=f"Airing {day} from your watchlist",
+            description=f"{len(anime)} anime on your watchlist air on {day}.",
+            color=discord.Color.blue()
+        )
+        for entry in anime[:25]:  # Discord's field limit
+            broadcast = f"{entry.broadcast_time} JST" if entry.broadcast_time else "Time unknown"
+            value = f"[{broadcast}]({entry.url})" if entry.url else broadcast
+            embed.add_field(name=entry.title or f"ID {entry.id}", value=value, inline=False)
+        embed.set_footer(text="Turn this off with .watchlist digest off")
+
+        try:
+            await user.send(embed=embed)
+            return True
+        except discord.Forbidden:
+            # DMs closed, nothing to retry
+            return False
+        except discord.HTTPException as e:
+            log.warning(f"Could not send airing digest to {user_id}: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Digest runs and delivery counts, plus the sender's rate limiter"""
+        return {**self.stats, "limiter": self.rate_limiter.get_stats()}
@@ -14,7 +14,8 @@ from redbot.core.utils.predicates import MessagePredicate
 
 from .malapi import MyAnimeListAPI
 from .cachemanager import CacheManager
-from .utils import create_embed, format_relative_time
+from .ratelimiter import PRIORITY_BACKGROUND
+from .utils import create_embed, format_relative_time, find_anime_channel, next_anime_season
 
 log = logging.getLogger("red.animeforum.event_manager")
 
@@ -108,81 +109,81 @@ class EventManager:
             jikan_day = (current_day + 1) % 7
             jikan_days = ["sunday", "monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
             
-            schedule = await self.mal_api.get_anime_schedule(jikan_days[jikan_day])
+            # Only the tracked anime airing today, looked up by ID in the week snapshot
+            today_schedule = await self.mal_api.get_scheduled_anime(
+                anime_ids, jikan_days[jikan_day], priority=PRIORITY_BACKGROUND
+            )
             
-            # No schedule data for today
-            if not schedule:
+            # No tracked anime airing today
+            if not today_schedule:
                 return
-                
-            # Get today's schedule
-            today_schedule = schedule.get(jikan_days[jikan_day].capitalize(), [])
             
-            # Filter to get only the anime we're tracking
+            # Forums under the category, matched to anime by name through the catalog
+            forums = [
+                c for c in guild.channels
+                if isinstance(c, discord.ForumChannel) and c.category_id == category.id
+            ]
+            
+            # Open an episode thread in each tracked anime's forum
             for anime in today_schedule:
                 anime_id = anime.get("id")
                 
-                if anime_id in anime_ids:
-                    # Find matching forum
-                    anime_title = anime.get("title")
-                    if not anime_title:
-                        continue
-                        
-                    forum_channel = discord.utils.find(
-                        lambda c: c.name.lower() == anime_title.lower().replace(" ", "-") and 
-                                  isinstance(c, discord.ForumChannel) and
-                                  c.category_id == category.id,
-                        guild.channels
+                # Find matching forum
+                anime_title = anime.get("title")
+                if not anime_title:
+                    continue
+                    
+                forum_channel = find_anime_channel(forums, anime_title, anime_id, self.mal_api.match_title)
+                
+                if not forum_channel:
+                    continue
+                    
+                # Create an episode discussion thread
+                episode_num = self._estimate_current_episode(anime)
+                
+                # Check if we already have a thread for this episode
+                thread_name = f"Episode {episode_num} Discussion"
+                existing_thread = discord.utils.find(
+                    lambda t: t.name.lower() == thread_name.lower() and t.parent_id == forum_channel.id,
+                    guild.threads
+                )
+                
+                if existing_thread:
+                    continue  # Skip if thread already exists
+                    
+                # Create new thread
+                try:
+                    # Find Discussion tag
+                    discussion_tag = discord.utils.find(
+                        lambda t: t.name == "Discussion", 
+                        forum_channel.available_tags
                     )
                     
-                    if not forum_channel:
-                        continue
-                        
-                    # Create an episode discussion thread
-                    episode_num = self._estimate_current_episode(anime)
+                    tags = [discussion_tag] if discussion_tag else []
                     
-                    # Check if we already have a thread for this episode
-                    thread_name = f"Episode {episode_num} Discussion"
-                    existing_thread = discord.utils.find(
-                        lambda t: t.name.lower() == thread_name.lower() and t.parent_id == forum_channel.id,
-                        guild.threads
+                    thread = await forum_channel.create_thread(
+                        name=thread_name,
+                        content=(
+                            f"# Episode {episode_num} Discussion\n\n"
+                            f"This thread is for discussing episode {episode_num} of **{anime_title}**.\n\n"
+                            f"**Please keep spoilers about future episodes out of this thread!**\n\n"
+                            f"Use Discord's spoiler tags `||like this||` for content from the episode that might be considered spoilers."
+                        ),
+                        applied_tags=tags
                     )
                     
-                    if existing_thread:
-                        continue  # Skip if thread already exists
-                        
-                    # Create new thread
-                    try:
-                        # Find Discussion tag
-                        discussion_tag = discord.utils.find(
-                            lambda t: t.name == "Discussion", 
-                            forum_channel.available_tags
-                        )
-                        
-                        tags = [discussion_tag] if discussion_tag else []
-                        
-                        thread = await forum_channel.create_thread(
-                            name=thread_name,
-                            content=(
-                                f"# Episode {episode_num} Discussion\n\n"
-                                f"This thread is for discussing episode {episode_num} of **{anime_title}**.\n\n"
-                                f"**Please keep spoilers about future episodes out of this thread!**\n\n"
-                                f"Use Discord's spoiler tags `||like this||` for content from the episode that might be considered spoilers."
-                            ),
-                            applied_tags=tags
+                    # Ping users who are watching this anime
+                    watchers = events_data.get("watching", {}).get(str(anime_id), [])
+                    if watchers:
+                        mentions = " ".join(f"<@{user_id}>" for user_id in watchers)
+                        await thread.send(
+                            f"New episode alert! {mentions}\n"
+                            f"Episode {episode_num} of **{anime_title}** is now available!"
                         )
                         
-                        # Ping users who are watching this anime
-                        watchers = events_data.get("watching", {}).get(str(anime_id), [])
-                        if watchers:
-                            mentions = " ".join(f"<@{user_id}>" for user_id in watchers)
-                            await thread.send(
-                                f"New episode alert! {mentions}\n"
-                                f"Episode {episode_num} of **{anime_title}** is now available!"
-                            )
-                            
-                    except Exception as e:
-                        log.error(f"Error creating episode thread: {e}")
-                    
+                except Exception as e:
+                    log.error(f"Error creating episode thread: {e}")
+                
         except Exception as e:
             log.error(f"Error checking airing notifications: {e}")
             
@@ -271,7 +272,7 @@ class EventManager:
             # Get anime details if we have the ID
             anime_details = None
             if anime_id and self.mal_api:
-                anime_details = await self.mal_api.get_anime_details(anime_id)
+                anime_details = await self.mal_api.get_anime_details(anime_id, priority=PRIORITY_BACKGROUND)
                 
             # Create embed for the watch party
             embed = discord.Embed(
@@ -315,7 +316,7 @@ class EventManager:
             # Get the seasonal anime
             seasonal_anime = []
             if self.mal_api:
-                seasonal_anime = await self.mal_api.get_seasonal_anime(year, season, limit=20)
+                seasonal_anime = await self.mal_api.get_seasonal_anime(year, season, limit=20, priority=PRIORITY_BACKGROUND)
                 
             if not seasonal_anime:
                 await channel.send(f"The {season.capitalize()} {year} anime season is starting, but we couldn't fetch the anime list.")
@@ -359,7 +360,7 @@ class EventManager:
             # Get anime details
             anime_details = None
             if self.mal_api:
-                anime_details = await self.mal_api.get_anime_details(anime_id)
+                anime_details = await self.mal_api.get_anime_details(anime_id, priority=PRIORITY_BACKGROUND)
                 
             if not anime_details:
                 await channel.send(message)
@@ -641,22 +642,8 @@ class EventManager:
                 if not upcoming_anime:
                     return await ctx.send("Could not fetch upcoming anime information.")
                     
-                # Get current season info to determine next season
-                current_season = await self.mal_api._make_jikan_request("seasons/now", {"limit": 1})
-                if not current_season or "data" not in current_season or not current_season["data"]:
-                    return await ctx.send("Could not determine current anime season.")
-                    
-                # Extract current season and year
-                sample_anime = current_season["data"][0]
-                current_year = int(sample_anime.get("year", datetime.now().year))
-                current_season_name = sample_anime.get("season", "").lower()
-                
-                # Calculate next season
-                seasons = ["winter", "spring", "summer", "fall"]
-                current_idx = seasons.index(current_season_name) if current_season_name in seasons else 0
-                next_idx = (current_idx + 1) % 4
-                next_season = seasons[next_idx]
-                next_year = current_year + 1 if next_idx == 0 else current_year
+                # Next season from the local calendar
+                next_season, next_year = next_anime_season()
                 
                 # Create embed
                 embed = discord.Embed(
@@ -836,15 +823,13 @@ class EventManager:
             if not watching_anime_ids:
                 return await ctx.send("You are not watching any anime.")
                 
-            # Get anime details for each ID
+            # Get anime details for all IDs at once (cache hits first, misses concurrently)
             watching_anime = []
-            for anime_id in watching_anime_ids:
-                try:
-                    anime_details = await self.mal_api.get_anime_details(int(anime_id))
-                    if anime_details:
-                        watching_anime.append(anime_details)
-                except:
-                    continue
+            async for _, anime_details in self.mal_api.get_anime_details_many(
+                [int(anime_id) for anime_id in watching_anime_ids]
+            ):
+                if anime_details:
+                    watching_anime.append(anime_details)
                     
             if not watching_anime:
                 return await ctx.send("Could not retrieve details for your watching list.")
@@ -11,17 +11,20 @@ from redbot.core.utils.chat_formatting import pagify
 
 from .malapi import MyAnimeListAPI
 from .cachemanager import CacheManager
-from .utils import create_embed, chunked_send, format_relative_time
+from .guildsettings import GuildSettingsCache
+from .ratelimiter import PRIORITY_BULK
+from .utils import create_embed, chunked_send, format_relative_time, find_anime_channel
 
 log = logging.getLogger("red.animeforum.forum_creator")
 
 class ForumCreator:
     """Handles creation and management of anime forum channels"""
     
-    def __init__(self, bot: Red, config: Config, cache: CacheManager):
+    def __init__(self, bot: Red, config: Config, cache: CacheManager, guild_settings: GuildSettingsCache):
         self.bot = bot
         self.config = config
         self.cache = cache
+        self.guild_settings = guild_settings
         self.mal_api = None  # Will be set by the main cog
         
     def set_mal_api(self, mal_api: MyAnimeListAPI):
@@ -30,7 +33,7 @@ class ForumCreator:
         
     async def create_anime_forum(self, ctx, name: str, anime_data: Dict = None):
         """Create a new anime forum channel"""
-        settings = await self.config.guild(ctx.guild).all()
+        settings = await self.guild_settings.get(ctx.guild)
         
         async with ctx.typing():
             try:
@@ -38,7 +41,7 @@ class ForumCreator:
                 status_msg = await ctx.send(f"Creating forum for **{name}**... Gathering anime information...")
                 
                 # Find or create the forums category
-                category_name = settings["forums_category_name"]
+                category_name = settings.forums_category_name
                 category = discord.utils.get(ctx.guild.categories, name=category_name)
                 
                 if not category:
@@ -46,7 +49,7 @@ class ForumCreator:
                     category = await ctx.guild.create_category(category_name)
                 
                 # Get anime info if enabled and not already provided
-                if settings["use_mal_data"] and not anime_data and self.mal_api:
+                if settings.use_mal_data and not anime_data and self.mal_api:
                     anime_data = await self.get_anime_info(name)
                     if anime_data:
                         await status_msg.edit(content=f"Creating forum for **{anime_data['title']}**... Setting up forum...")
@@ -78,7 +81,7 @@ class ForumCreator:
                     await status_msg.edit(content=f"Anime forum channel **{name}** has been created!")
                 
                 # Create initial threads if auto-thread creation is enabled
-                if settings.get("auto_thread_create", False) and anime_data:
+                if settings.auto_thread_create and anime_data:
                     await self.create_initial_threads(forum_channel, anime_data)
                     
             except Exception as e:
@@ -87,7 +90,7 @@ class ForumCreator:
                 
     async def create_seasonal_forums(self, ctx):
         """Create forum channels for current season anime"""
-        settings = await self.config.guild(ctx.guild).all()
+        settings = await self.guild_settings.get(ctx.guild)
         
         if not self.mal_api:
             return await ctx.send("MAL API not initialized. Contact the bot owner.")
@@ -96,28 +99,39 @@ class ForumCreator:
         
         try:
             # Find or create the forums category
-            category_name = settings["forums_category_name"]
+            category_name = settings.forums_category_name
             category = discord.utils.get(ctx.guild.categories, name=category_name)
             
             if not category:
                 # Create the category
                 category = await ctx.guild.create_category(category_name)
                 
-            # Get current season anime from Jikan API
+            max_create = settings.max_bulk_create
+            created_forums = []
+            existing_forums = []
+            processed = 0
+            
+            await status_msg.edit(content="Creating forums for seasonal anime...")
+            
+            # Walk the whole season page by page; no more pages are fetched
+            # once enough new forums have been created
             try:
-                seasonal_anime = await self.mal_api.get_seasonal_anime(limit=settings["rate_limits"]["max_bulk_create"])
-                
-                if not seasonal_anime:
-                    await status_msg.edit(content="Error accessing anime API. Using fallback list.")
-                    seasonal_anime = [
-                        {"title": "Spy x Family"}, 
-                        {"title": "Demon Slayer"}, 
-                        {"title": "Jujutsu Kaisen"}, 
-                        {"title": "My Hero Academia"}, 
-                        {"title": "One Piece"}
-                    ]
+                async for anime in self.mal_api.iter_seasonal_anime(priority=PRIORITY_BULK):
+                    processed += 1
+                    await self._create_seasonal_forum(ctx, category, anime, settings, created_forums, existing_forums)
+                    
+                    # Update status periodically
+                    if processed % 3 == 0:
+                        await status_msg.edit(
+                            content=f"Creating forums for seasonal anime... ({len(created_forums)}/{max_create} created)"
+                        )
+                    if len(created_forums) >= max_create:
+                        break
             except Exception as e:
-                await status_msg.edit(content=f"Error accessing anime API: {e}. Using fallback list.")
+                log.error(f"Error fetching seasonal anime: {e}")
+                
+            if not processed:
+                await status_msg.edit(content="Error accessing anime API. Using fallback list.")
                 seasonal_anime = [
                     {"title": "Spy x Family"}, 
                     {"title": "Demon Slayer"}, 
@@ -125,45 +139,8 @@ class ForumCreator:
                     {"title": "My Hero Academia"}, 
                     {"title": "One Piece"}
                 ]
-            
-            await status_msg.edit(content=f"Creating forums for {len(seasonal_anime)} seasonal anime...")
-            
-            created_forums = []
-            existing_forums = []
-            
-            for index, anime in enumerate(seasonal_anime):
-                # Update status periodically
-                if index % 3 == 0:
-                    await status_msg.edit(content=f"Creating forums for seasonal anime... ({index}/{len(seasonal_anime)})")
-                
-                # Check if forum already exists (case insensitive)
-                title = anime.get("title", "Unknown")
-                normalized_name = title.lower().replace(" ", "-")
-                
-                existing_channel = discord.utils.find(
-                    lambda c: c.name.lower() == normalized_name,
-                    ctx.guild.channels
-                )
-                
-                if existing_channel:
-                    existing_forums.append(title)
-                    continue
-                
-                # Create the forum
-                try:
-                    await self.create_forum_channel(
-                        ctx.guild, 
-                        title, 
-                        category, 
-                        anime, 
-                        is_seasonal=True
-                    )
-                    created_forums.append(title)
-                    
-                    # Sleep to avoid rate limits
-                    await asyncio.sleep(settings["rate_limits"]["cooldown_seconds"])
-                except Exception as e:
-                    log.error(f"Error creating forum for {title}: {e}")
+                for anime in seasonal_anime:
+                    await self._create_seasonal_forum(ctx, category, anime, settings, created_forums, existing_forums)
             
             # Final message
             message = []
@@ -177,9 +154,37 @@ class ForumCreator:
         except Exception as e:
             await status_msg.edit(content=f"Error creating seasonal anime forums: {e}")
             
+    async def _create_seasonal_forum(self, ctx, category, anime, settings, created_forums, existing_forums):
+        """Create one seasonal forum unless it already exists, recording the outcome"""
+        # Check if forum already exists
+        title = anime.get("title", "Unknown")
+        existing_channel = find_anime_channel(
+            ctx.guild.channels, title, anime.get("id"), self.mal_api.match_title
+        )
+        
+        if existing_channel:
+            existing_forums.append(title)
+            return
+        
+        # Create the forum
+        try:
+            await self.create_forum_channel(
+                ctx.guild, 
+                title, 
+                category, 
+                anime, 
+                is_seasonal=True
+            )
+            created_forums.append(title)
+            
+            # Sleep to avoid rate limits
+            await asyncio.sleep(settings.cooldown_seconds)
+        except Exception as e:
+            log.error(f"Error creating forum for {title}: {e}")
+            
     async def create_toptier_forums(self, ctx):
         """Create forum channels for top-rated anime"""
-        settings = await self.config.guild(ctx.guild).all()
+        settings = await self.guild_settings.get(ctx.guild)
         
         if not self.mal_api:
             return await ctx.send("MAL API not initialized. Contact the bot owner.")
@@ -188,7 +193,7 @@ class ForumCreator:
         
         try:
             # Find or create the forums category
-            category_name = settings["forums_category_name"]
+            category_name = settings.forums_category_name
             category = discord.utils.get(ctx.guild.categories, name=category_name)
             
             if not category:
@@ -197,7 +202,10 @@ class ForumCreator:
                 
             # Get top anime from Jikan API
             try:
-                top_anime = await self.mal_api.get_top_anime(limit=settings["rate_limits"]["max_bulk_create"])
+                top_anime = await self.mal_api.get_top_anime(
+                    limit=settings.max_bulk_create,
+                    priority=PRIORITY_BULK
+                )
                 
                 if not top_anime:
                     await status_msg.edit(content="Error accessing anime API. Using fallback list.")
@@ -230,11 +238,8 @@ class ForumCreator:
                 
                 # Check if forum already exists
                 title = anime.get("title", "Unknown")
-                normalized_name = title.lower().replace(" ", "-")
-                
-                existing_channel = discord.utils.find(
-                    lambda c: c.name.lower() == normalized_name,
-                    ctx.guild.channels
+                existing_channel = find_anime_channel(
+                    ctx.guild.channels, title, anime.get("id"), self.mal_api.match_title
                 )
                 
                 if existing_channel:
@@ -253,7 +258,7 @@ class ForumCreator:
                     created_forums.append(title)
                     
                     # Sleep to avoid rate limits
-                    await asyncio.sleep(settings["rate_limits"]["cooldown_seconds"])
+                    await asyncio.sleep(settings.cooldown_seconds)
                 except Exception as e:
                     log.error(f"Error creating forum for {title}: {e}")
             
@@ -275,16 +280,19 @@ class ForumCreator:
             return None
             
         try:
-            # Search for the anime
-            results = await self.mal_api.search_anime(name, limit=1)
-            if not results:
-                return None
+            # Titles and forum names the catalog already knows skip the search
+            anime_id = self.mal_api.match_title(name)
+            
+            if not anime_id:
+                results = await self.mal_api.search_anime(name, limit=1)
+                if not results:
+                    return None
+                anime_id = results[0].get("id") or results[0].get("mal_id")
                 
-            # Get detailed info
-            anime_id = results[0].get("id") or results[0].get("mal_id")
             if not anime_id:
                 return None
                 
+            # Get detailed info
             return await self.mal_api.get_anime_details(anime_id)
                 
         except Exception as e:
@@ -293,7 +301,7 @@ class ForumCreator:
     
     async def create_forum_channel(self, guild, name: str, category=None, anime_data=None, is_seasonal=False, is_top_rated=False):
         """Create a forum channel with optimized settings"""
-        settings = await self.config.guild(guild).all()
+        settings = await self.guild_settings.get(guild)
         
         # Prepare forum tags
         forum_tags = []
@@ -308,7 +316,7 @@ class ForumCreator:
             forum_tags.append(top_rated_tag)
         
         # Add default tags
-        for tag_name in settings["default_tags"]:
+        for tag_name in settings.default_tags:
             # Skip the tags we already added
             if (tag_name == "Seasonal" and is_seasonal) or (tag_name == "Top Rated" and is_top_rated):
                 continue
@@ -317,11 +325,11 @@ class ForumCreator:
         # Add genre tags if available
         if anime_data and anime_data.get("genres"):
             for genre in anime_data.get("genres", [])[:10]:  # Limit to 10 genres
-                if genre not in settings["default_tags"]:
+                if genre not in settings.default_tags:
                     forum_tags.append(discord.ForumTag(name=genre))
         
         # Create guidelines for the forum
-        if settings["default_post_guidelines"]:
+        if settings.default_post_guidelines:
             if anime_data:
                 synopsis = anime_data.get("synopsis", "")
                 if synopsis and len(synopsis) > 500:
@@ -363,8 +371,12 @@ class ForumCreator:
         # Set the available tags
         await forum_channel.edit(available_tags=forum_tags)
         
+        # Remember which anime this forum is for, so its name resolves locally
+        if anime_data and self.mal_api:
+            self.mal_api.link_forum(forum_channel.name, anime_data.get("id"))
+        
         # Set suggested format if using MyAnimeList data
-        if anime_data and settings["use_mal_data"]:
+        if anime_data and settings.use_mal_data:
             # Create guidelines format that encourages structured discussions
             suggested_format = (
                 f"**Topic**: \n\n"
@@ -453,7 +465,7 @@ class ForumCreator:
                 pass
                 
         # Handle spoiler detection if enabled
-        if settings["moderation"].get("spoiler_detection", False):
+        if settings.spoiler_detection:
             spoiler_keywords = ["spoiler", "spoilers", "just happened", "plot twist", "reveals", "ending"]
             has_spoiler_tag = any(tag.name == "Spoiler" for tag in current_tags)
             
@@ -479,8 +491,10 @@ class ForumCreator:
     async def process_new_thread(self, thread, settings):
         """Process a newly created thread"""
         try:
-            # Find anime name from forum name
-            anime_name = thread.parent.name.replace("-", " ").title()
+            # Map the forum back to its anime locally, the channel name is only a fallback
+            anime_id = self.mal_api.match_title(thread.parent.name) if self.mal_api else None
+            known = self.mal_api.catalog.get(anime_id) if anime_id else None
+            anime_name = known["title"] if known else thread.parent.name.replace("-", " ").title()
             thread_name = thread.name
             
             # Create a welcoming message
@@ -523,7 +537,10 @@ class ForumCreator:
             # For seasonal anime, add episode reminder
             has_seasonal = any(tag.name == "Seasonal" for tag in thread.applied_tags)
             if has_seasonal and self.mal_api:
-                anime_info = await self.get_anime_info(anime_name)
+                if anime_id:
+                    anime_info = await self.mal_api.get_anime_details(anime_id)
+                else:
+                    anime_info = await self.get_anime_info(anime_name)
                 if anime_info and anime_info.get("airing"):
                     # Get schedule info
                     next_episode_str = ""
@@ -0,0 +1,183 @@
+import logging
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from redbot.core import Config
+
+log = logging.getLogger("red.animeforum.guild_settings")
+
+
+class GuildSettings:
+    """
+    Read-only snapshot of one guild's anime forum settings
+
+    Built from the guild's Config data, with the nested moderation,
+    analytics, notifications and rate_limits groups flattened into typed
+    attributes. Watchlists, watch parties and other growing data are not
+    part of the snapshot.
+    """
+
+    __slots__ = (
+        "forum_command_prefix", "forums_category_name", "mention_message", "default_tags",
+        "auto_topic", "use_mal_data", "default_post_guidelines", "auto_thread_create",
+        "spoiler_detection", "content_filter", "auto_organize",
+        "analytics_enabled", "track_activity", "leaderboard_enabled",
+        "notify_new_episodes", "notify_new_seasons",
+        "max_forums_per_minute", "max_bulk_create", "cooldown_seconds"
+    )
+
+    def __init__(self, data: Dict):
+        """
+        Build a snapshot from the dict returned by config.guild(guild).all()
+
+        Parameters:
+        -----------
+        data: Dict
+            The guild's settings, registered defaults included
+        """
+        self.forum_command_prefix: str = data["forum_command_prefix"]
+        self.forums_category_name: str = data["forums_category_name"]
+        self.mention_message: str = data["mention_message"]
+        self.default_tags: Tuple[str, ...] = tuple(data["default_tags"])
+        self.auto_topic: bool = bool(data["auto_topic"])
+        self.use_mal_data: bool = bool(data["use_mal_data"])
+        self.default_post_guidelines: bool = bool(data["default_post_guidelines"])
+        self.auto_thread_create: bool = bool(data["auto_thread_create"])
+
+        moderation = data["moderation"]
+        self.spoiler_detection: bool = bool(moderation.get("spoiler_detection", False))
+        self.content_filter: bool = bool(moderation.get("content_filter", False))
+        self.auto_organize: bool = bool(moderation.get("auto_organize", False))
+
+        analytics = data["analytics"]
+        self.analytics_enabled: bool = bool(analytics.get("enabled", False))
+        self.track_activity: bool = bool(analytics.get("track_activity", False))
+        self.leaderboard_enabled: bool = bool(analytics.get("leaderboard_enabled", False))
+
+        notifications = data["notifications"]
+        self.notify_new_episodes: bool = bool(notifications.get("new_episodes", True))
+        self.notify_new_seasons: bool = bool(notifications.get("new_seasons", True))
+
+        rate_limits = data["rate_limits"]
+        self.max_forums_per_minute: int = int(rate_limits["max_forums_per_minute"])
+        self.max_bulk_create: int = int(rate_limits["max_bulk_create"])
+        self.cooldown_seconds: float = float(rate_limits["cooldown_seconds"])
+
+    @property
+    def tracks_messages(self) -> bool:
+        """Whether messages and threads should be recorded for analytics"""
+        return self.analytics_enabled and self.track_activity
+
+    def __repr__(self) -> str:
+        return f"<GuildSettings category={self.forums_category_name!r} prefix={self.forum_command_prefix!r}>"
+
+
+class GuildRoute:
+    """
+    What on_message needs to know about a guild, precomputed
+
+    forum_ids holds the forum channels under the guild's anime category, so
+    a message can be routed with a set lookup on its thread's parent_id.
+    """
+
+    __slots__ = ("forum_ids", "tracks_messages", "answers_mentions", "settings")
+
+    def __init__(self, forum_ids: FrozenSet[int], settings: GuildSettings):
+        self.forum_ids = forum_ids
+        self.tracks_messages = settings.tracks_messages
+        self.answers_mentions = bool(settings.mention_message)
+        self.settings = settings
+
+
+class GuildSettingsCache:
+    """
+    Per-guild GuildSettings snapshots kept in memory
+
+    Each guild's settings are read from Config once and then served from
+    memory. Commands that change a setting call invalidate() afterwards, and
+    the next get() reads Config again.
+
+    A GuildRoute per guild is derived from the snapshot and the guild's
+    channels. It is dropped with the snapshot and whenever a channel is
+    created, deleted or edited (invalidate_route()).
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.snapshots: Dict[int, GuildSettings] = {}
+        self.routes: Dict[int, GuildRoute] = {}
+        # Bumped by invalidate(), so a load racing with a change isn't stored
+        self.generations: Dict[int, int] = {}
+        self.stats = {"hits": 0, "loads": 0}
+
+    async def get(self, guild) -> GuildSettings:
+        """Settings snapshot of a guild, reading Config only if it isn't loaded"""
+        snapshot = self.snapshots.get(guild.id)
+        if snapshot is not None:
+            self.stats["hits"] += 1
+            return snapshot
+
+        generation = self.generations.get(guild.id, 0)
+        snapshot = GuildSettings(await self.config.guild(guild).all())
+        self.stats["loads"] += 1
+        if self.generations.get(guild.id, 0) == generation:
+            self.snapshots[guild.id] = snapshot
+        return snapshot
+
+    async def load_all(self) -> None:
+        """Load every guild that has stored settings in one Config read"""
+        all_guilds = await self.config.all_guilds()
+        for guild_id, data in all_guilds.items():
+            if guild_id not in self.snapshots:
+                try:
+                    self.snapshots[guild_id] = GuildSettings(data)
+                except (KeyError, TypeError, ValueError) as e:
+                    log.error(f"Invalid settings stored for guild {guild_id}: {e}")
+
+    def route(self, guild) -> Optional[GuildRoute]:
+        """
+        Routing entry of a guild without awaiting anything
+
+        Built from the loaded snapshot on first use; None if the guild's
+        settings aren't loaded yet (see get_route()).
+        """
+        route = self.routes.get(guild.id)
+        if route is not None:
+            return route
+
+        settings = self.snapshots.get(guild.id)
+        if settings is None:
+            return None
+
+        route = self.routes[guild.id] = self._build_route(guild, settings)
+        return route
+
+    async def get_route(self, guild) -> GuildRoute:
+        """Routing entry of a guild, loading its settings first if needed"""
+        route = self.route(guild)
+        if route is None:
+            settings = await self.get(guild)
+            route = self.route(guild) or self._build_route(guild, settings)
+        return route
+
+    @staticmethod
+    def _build_route(guild, settings: GuildSettings) -> GuildRoute:
+        """Collect the forums under the guild's anime category"""
+        forum_ids = frozenset(
+            forum.id for forum in guild.forums
+            if forum.category is not None and forum.category.name == settings.forums_category_name
+        )
+        return GuildRoute(forum_ids, settings)
+
+    def invalidate(self, guild_id: int) -> None:
+        """Drop a guild's snapshot after its settings changed"""
+        self.snapshots.pop(guild_id, None)
+        self.routes.pop(guild_id, None)
+        self.generations[guild_id] = self.generations.get(guild_id, 0) + 1
+
+    def invalidate_route(self, guild_id: int) -> None:
+        """Drop a guild's routing entry after its channels changed"""
+        self.routes.pop(guild_id, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Loaded guilds and routes, snapshot hits and Config loads"""
+        return {"guilds": len(self.snapshots), "routes": len(self.routes), **self.stats}
@@ -1,331 +1,938 @@
 import asyncio
 import logging
+import random
 import time
-from typing import Dict, List, Optional, Any, Union
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Union, AsyncIterator, Tuple
 import aiohttp
 import json
-import random
-from datetime import datetime
 
 from .cachemanager import CacheManager
+from .catalog import AnimeCatalog, normalize_title, title_terms, query_matches
+from .ratelimiter import RateLimiter, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND, PRIORITY_BULK
+from .circuitbreaker import CircuitBreaker, RetryBudget
+from .records import AnimeRecord
+from .utils import calculate_anime_seasons, next_anime_season
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
 
 log = logging.getLogger("red.animeforum.mal_api")
 
 class MyAnimeListAPI:
     """Handles interaction with MyAnimeList API"""
     
-    def __init__(self, session: aiohttp.ClientSession, cache: CacheManager):
+    MAL_DETAIL_PARAMS = {
+        "fields": "id,title,main_picture,alternative_titles,start_date,end_date,synopsis,mean,rank,popularity,num_episodes,media_type,status,genres,studios,related_anime,recommendations,background,pictures,statistics"
+    }
+    
+    def __init__(self, session: aiohttp.ClientSession, cache: CacheManager, catalog: AnimeCatalog = None):
         self.session = session
         self.cache = cache
+        self.catalog = catalog  # Local title index, consulted before searching upstream
         self.client_id = None
         self.base_url = "https://api.myanimelist.net/v2"
         self.jikan_url = "https://api.jikan.moe/v4"
-        self.rate_limit_lock = asyncio.Lock()
-        self.rate_limit_remaining = 60
-        self.rate_limit_reset = 0
+        
+        # Token buckets per upstream; requests run concurrently while tokens last
+        self.rate_limiters = {
+            # Jikan allows 3 requests per second and 60 per minute
+            "jikan": RateLimiter("jikan", [(3, 1.0), (60, 60.0)]),
+            # MAL doesn't publish limits, so stay conservative
+            "mal": RateLimiter("mal", [(2, 1.0), (60, 60.0)])
+        }
+        
+        # Circuit breakers and retry budgets per API: fail fast while an upstream is down
+        self.breakers = {api_type: CircuitBreaker(api_type) for api_type in ("jikan", "mal")}
+        self.retry_budgets = {api_type: RetryBudget() for api_type in ("jikan", "mal")}
+        self.max_retries = 2
+        self.retry_base_delay = 0.5  # Seconds, doubled per attempt with full jitter
+        self.request_timeout = aiohttp.ClientTimeout(total=10)
+        
+        # In-flight requests keyed by cache key, shared by concurrent callers
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._inflight_waiters: Dict[asyncio.Task, int] = {}
+        
+        # Hedging: if MAL hasn't answered by a latency percentile, ask Jikan too
+        self.hedging = False
+        self.hedge_percentile = 0.9
+        self.hedge_max_ratio = 0.1  # At most this share of recent upstream MAL requests may hedge
+        self.hedge_default_delay = 1.0  # Seconds, until enough latencies are sampled
+        self.primary_latencies = deque(maxlen=200)  # Seconds taken by upstream MAL requests
+        self.primary_requests = deque(maxlen=100)  # Monotonic start times of upstream MAL requests
+        self.recent_hedges = deque(maxlen=100)  # Monotonic times of recent hedges
+        self.hedge_stats = {"hedged": 0, "primary_wins": 0, "secondary_wins": 0, "capped": 0}
+        
+        # Whole-week airing schedule, fetched as one snapshot and sliced locally
+        self.schedule_interval = 3600  # Seconds between refreshes by schedule_refresher()
+        self.schedule_by_day: Dict[str, List[AnimeRecord]] = {}
+        self.schedule_by_id: Dict[int, AnimeRecord] = {}
+        self.schedule_updated = 0.0  # Monotonic time of the last successful refresh
+        self._schedule_refresh: Optional[asyncio.Task] = None
+        
+        # Title terms of the upcoming season's anime, rebuilt when the list changes
+        self._upcoming_key = None
+        self._upcoming_terms: List[set] = []
+        self.request_stats = {
+            "sent": 0,       # Upstream fetches started (one per cache key at a time)
+            "coalesced": 0,  # Callers that joined an in-flight request instead
+            "stale_served": 0,  # Stale cache hits returned while refreshing
+            "refreshes": 0,  # Background refreshes started for stale entries
+            "negative_hits": 0,  # Lookups answered by a cached 404/empty result
+            "breaker_skips": 0,  # Requests refused locally while a circuit was open
+            "retries": 0,        # Attempts repeated after a timeout, connection error or 5xx
+            "revalidated": 0     # Conditional requests answered with 304 Not Modified
+        }
         
     def set_client_id(self, client_id: str):
         """Set the MyAnimeList API client ID"""
         self.client_id = client_id
         
-    async def _handle_rate_limit(self, api_type: str = "jikan"):
+    async def _handle_rate_limit(self, api_type: str = "jikan", priority: str = PRIORITY_INTERACTIVE):
         """Handle rate limiting for API calls"""
-        async with self.rate_limit_lock:
-            current_time = time.time()
+        await self.rate_limiters[api_type].acquire(priority)
+    
+    async def _single_flight(self, cache_key: str, fetch) -> Optional[Dict]:
+        """
+        Run fetch() once per cache key, sharing the result with concurrent callers
+        
+        Parameters:
+        -----------
+        cache_key: str
+            Key identifying the request
+        fetch: Callable
+            Zero-argument coroutine function that performs the request
+        """
+        while True:
+            task = self._inflight.get(cache_key)
+            if task is not None:
+                self.request_stats["coalesced"] += 1
+            else:
+                task = self._start_flight(cache_key, fetch)
+                
+            # wait() so one caller being cancelled doesn't cancel the shared request,
+            # but drop the request once nobody is waiting on it any more
+            self._inflight_waiters[task] = self._inflight_waiters.get(task, 0) + 1
+            try:
+                await asyncio.wait({task})
+            finally:
+                self._inflight_waiters[task] -= 1
+                if not self._inflight_waiters[task]:
+                    del self._inflight_waiters[task]
+                    if not task.done():
+                        # Forget it in the same step, so nobody joins a cancelled request
+                        self._forget_flight(cache_key, task)
+                        task.cancel()
+                        
+            if not task.cancelled():
+                return task.result()
+            # Cancelled by something other than its waiters; we still want the result
+        
+    def _start_flight(self, cache_key: str, fetch) -> asyncio.Task:
+        """Start fetch() as the in-flight request for a cache key"""
+        self.request_stats["sent"] += 1
+        task = asyncio.ensure_future(fetch())
+        self._inflight[cache_key] = task
+        task.add_done_callback(lambda _: self._forget_flight(cache_key, task))
+        return task
+        
+    def _forget_flight(self, cache_key: str, task: asyncio.Task) -> None:
+        """Drop a request from the in-flight table, unless a newer one replaced it"""
+        if self._inflight.get(cache_key) is task:
+            del self._inflight[cache_key]
+        
+    async def _cached_or_fetch(self, cache_key: str, fetch) -> Optional[Dict]:
+        """
+        Serve a request from the cache, falling back to a shared upstream fetch
+        
+        Stale entries are returned immediately and refreshed in the background,
+        so only entries past the cache's hard TTL make the caller wait.
+        """
+        is_negative, negative_value = self.cache.get_negative(cache_key)
+        if is_negative:
+            self.request_stats["negative_hits"] += 1
+            return negative_value
             
-            # Different rate limits for different APIs
-            if api_type == "mal":
-                # MAL API has very generous limits, so we're conservative
-                await asyncio.sleep(0.5)
-                return
+        cached_data, is_stale = self.cache.get_stale(cache_key)
+        if cached_data is None:
+            return await self._single_flight(cache_key, fetch)
+            
+        if is_stale:
+            self.request_stats["stale_served"] += 1
+            # No point refreshing while the upstream's circuit is open
+            if cache_key not in self._inflight and not self.breakers[cache_key.split(":", 1)[0]].is_open():
+                self.request_stats["refreshes"] += 1
+                self._start_flight(cache_key, fetch)
+                
+        return cached_data
+        
+    def _hedge_delay(self) -> float:
+        """Seconds to wait for the primary before hedging: the configured latency percentile"""
+        if len(self.primary_latencies) < 20:
+            return self.hedge_default_delay
+        ordered = sorted(self.primary_latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile))
+        return ordered[index]
+        
+    def _hedge_capped(self) -> bool:
+        """Whether hedges already make up hedge_max_ratio of the recent upstream MAL requests"""
+        since = self.primary_requests[0] if self.primary_requests else time.monotonic()
+        hedges = sum(1 for hedged_at in self.recent_hedges if hedged_at >= since)
+        return hedges >= self.hedge_max_ratio * self.primary_requests.maxlen
+        
+    async def _primary_with_fallback(self, primary, secondary):
+        """
+        Run primary(), using secondary() if it fails, or in parallel when hedging
+        
+        Both arguments are zero-argument coroutine functions returning a
+        normalized result, or None/empty when they have nothing. Without
+        hedging the secondary only starts after the primary gave up. With
+        hedging it also starts once the primary has been slower than the
+        configured latency percentile (subject to the hedge rate cap); the
+        first valid result wins and the other request is cancelled. Latencies
+        and the cap count upstream MAL requests only (see _fetch_mal), so
+        cache hits don't lower the delay or make room for more hedges.
+        """
+        if not self.hedging:
+            result = await primary()
+            return result if result else await secondary()
+            
+        primary_task = asyncio.ensure_future(primary())
+        done, _ = await asyncio.wait({primary_task}, timeout=self._hedge_delay())
+        
+        if done:
+            result = primary_task.result()
+            return result if result else await secondary()
+            
+        # Primary is slow; only hedge if we're under the rate cap
+        if self._hedge_capped():
+            self.hedge_stats["capped"] += 1
+            result = await primary_task
+            return result if result else await secondary()
+            
+        self.hedge_stats["hedged"] += 1
+        self.recent_hedges.append(time.monotonic())
+        secondary_task = asyncio.ensure_future(secondary())
+        pending = {primary_task, secondary_task}
+        
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result:
+                        winner = "primary_wins" if task is primary_task else "secondary_wins"
+                        self.hedge_stats[winner] += 1
+                        return result
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+        
+    async def _send(self, api_type: str, url: str, params: Dict = None, headers: Dict = None,
+                    priority: str = PRIORITY_INTERACTIVE) -> Optional[Tuple[int, Any, Optional[Dict]]]:
+        """
+        Send a GET through the API's circuit breaker and rate limiter
+        
+        Timeouts, connection errors and 5xx responses count as failures and
+        are retried with jittered exponential backoff, as long as the retry
+        budget and the circuit allow it.
+        
+        Returns:
+        --------
+        Optional[Tuple[int, Any, Optional[Dict]]]: (status, headers, JSON body
+        for 200 responses), or None if the circuit is open or every attempt failed
+        """
+        breaker = self.breakers[api_type]
+        limiter = self.rate_limiters[api_type]
+        self.retry_budgets[api_type].record_request()
+        
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self.request_stats["breaker_skips"] += 1
+                return None
+                
+            healthy = None
+            try:
+                # Inside the try, so a probe cancelled while waiting for a token is released
+                await self._handle_rate_limit(api_type, priority)
                 
-            # For Jikan API, we need to be more careful (60 requests per minute)
-            if self.rate_limit_remaining <= 1:
-                # Calculate how long to wait for reset
-                wait_time = max(0, self.rate_limit_reset - current_time)
-                if wait_time > 0:
-                    log.info(f"Rate limit reached, waiting {wait_time:.2f} seconds")
-                    await asyncio.sleep(wait_time + 1)  # Add a buffer second
-                    self.rate_limit_remaining = 60
-                    self.rate_limit_reset = time.time() + 60
+                async with self.session.get(url, params=params, headers=headers,
+                                            timeout=self.request_timeout) as resp:
+                    limiter.update_from_headers(resp.headers)
+                    if resp.status == 429:
+                        limiter.block(float(resp.headers.get("Retry-After", 2)))
+                        
+                    if resp.status >= 500:
+                        healthy = False
+                        error = f"status {resp.status}"
+                    else:
+                        data = await resp.json() if resp.status == 200 else None
+                        healthy = True
+                        return resp.status, resp.headers, data
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                healthy = False
+                error = repr(e)
+            finally:
+                if healthy:
+                    breaker.record_success()
+                elif healthy is False:
+                    breaker.record_failure()
+                else:
+                    breaker.release()
                     
-            # Decrement remaining and add jitter to prevent thundering herd
-            self.rate_limit_remaining -= 1
-            await asyncio.sleep(random.uniform(0.1, 0.3))
+            attempt += 1
+            if attempt > self.max_retries or not self.retry_budgets[api_type].try_retry():
+                log.error(f"{api_type} API request failed ({error}) for {url}")
+                return None
+                
+            self.request_stats["retries"] += 1
+            await asyncio.sleep(random.uniform(0, self.retry_base_delay * 2 ** attempt))
     
-    async def _make_jikan_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
-        """Make a request to Jikan API with rate limiting"""
-        cache_key = f"jikan:{endpoint}:{json.dumps(params or {})}"
+    def get_request_stats(self) -> Dict[str, Any]:
+        """
+        Get request coalescing statistics
         
-        # Check cache first
-        cached_data = self.cache.get(cache_key)
-        if cached_data is not None:
-            return cached_data
-            
-        # Handle rate limiting
-        await self._handle_rate_limit("jikan")
+        Returns:
+        --------
+        Dict[str, Any]: Counts of upstream, coalesced, stale and in-flight requests
+        """
+        stats = dict(self.request_stats)
+        stats["in_flight"] = len(self._inflight)
+        if self.hedging:
+            stats["hedging"] = dict(self.hedge_stats, delay=round(self._hedge_delay(), 3))
+        for api_type, limiter in self.rate_limiters.items():
+            stats[f"{api_type}_limiter"] = limiter.get_stats()
+            stats[f"{api_type}_breaker"] = dict(
+                self.breakers[api_type].get_stats(),
+                retry_budget=self.retry_budgets[api_type].get_stats()
+            )
+        if self.catalog is not None:
+            stats["catalog"] = self.catalog.get_stats()
+        if self.schedule_by_id:
+            stats["schedule"] = {
+                "anime": len(self.schedule_by_id),
+                "age": round(time.monotonic() - self.schedule_updated)
+            }
+        return stats
+    
+    @staticmethod
+    def _cache_key(api_type: str, endpoint: str, params: Dict = None, records: bool = False) -> str:
+        """Cache key for an API request; records=True for responses cached as AnimeRecords"""
+        key = f"{api_type}:{endpoint}:{json.dumps(params or {})}"
+        return f"{key}|records" if records else key
+        
+    @staticmethod
+    def _validator_key(cache_key: str) -> str:
+        """Cache key holding the ETag/Last-Modified validators of a cached response"""
+        return f"{cache_key}|validators"
+    
+    async def _make_jikan_request(self, endpoint: str, params: Dict = None,
+                                  priority: str = PRIORITY_INTERACTIVE, transform=None,
+                                  fresh: bool = False) -> Optional[Dict]:
+        """
+        Make a request to Jikan API with rate limiting
+        
+        transform, if given, converts a fresh response into what gets cached and
+        returned (e.g. AnimeRecords), so it runs once per fetch rather than per call.
+        
+        fresh skips stale and negative entries and always asks the upstream
+        (conditionally, if validators are cached). The cached copy is only
+        returned if that request fails.
+        """
+        cache_key = self._cache_key("jikan", endpoint, params, records=transform is not None)
+        fetch = lambda: self._fetch_jikan(endpoint, params, cache_key, priority, transform)
+        if fresh:
+            result = await self._single_flight(cache_key, fetch)
+            return result if result is not None else self.cache.get_stale(cache_key, record=False)[0]
+        return await self._cached_or_fetch(cache_key, fetch)
+        
+    async def _fetch_jikan(self, endpoint: str, params: Optional[Dict], cache_key: str,
+                           priority: str = PRIORITY_INTERACTIVE, transform=None) -> Optional[Dict]:
+        """Send a Jikan request upstream and cache the response
+        
+        Successful responses are cached (after transform, if any) along with their ETag and
+        Last-Modified validators. While an expired response is still cached,
+        the request is made conditional; a 304 only extends the cached entry's
+        TTL, with no body to download or decode.
         
+        404s and empty 'data' lists get a short-lived negative entry. Failures
+        are handled by _send() and never cached.
+        """
+        # Revalidate instead of refetching when the stale response is still around
+        validator_key = self._validator_key(cache_key)
+        # _cached_or_fetch already counted this lookup
+        cached_data, _ = self.cache.get_stale(cache_key, record=False)
+        validators = self.cache.get_stale(validator_key, record=False)[0] if cached_data is not None else None
+        headers = {}
+        if validators:
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+            
         try:
             url = f"{self.jikan_url}/{endpoint}"
-            async with self.session.get(url, params=params) as resp:
-                # Update rate limit info
-                self.rate_limit_remaining = int(resp.headers.get("X-RateLimit-Remaining", self.rate_limit_remaining))
-                reset_time = int(resp.headers.get("X-RateLimit-Reset", 0))
-                if reset_time:
-                    self.rate_limit_reset = reset_time
+            response = await self._send("jikan", url, params, headers or None, priority)
+            if response is None:
+                return None
+            status, response_headers, data = response
+            
+            if status == 304 and headers:
+                # Unchanged upstream, keep serving what we have
+                self.request_stats["revalidated"] += 1
+                self.cache.touch(cache_key)
+                self.cache.touch(validator_key)
+                return cached_data
                 
-                if resp.status != 200:
-                    log.error(f"Jikan API error: {resp.status} for {url}")
-                    return None
-                    
-                data = await resp.json()
+            if status == 404:
+                self.cache.set_negative(cache_key)
+                return None
                 
-                # Cache the response
-                self.cache.set(cache_key, data)
+            if status != 200:
+                log.error(f"Jikan API error: {status} for {url}")
+                return None
+                
+            # Empty results are cached separately with a short TTL
+            if isinstance(data, dict) and data.get("data") == []:
+                self.cache.set_negative(cache_key, data)
                 return data
+            
+            # Cache the response and whatever validators came with it
+            if transform is not None:
+                data = transform(data)
+            self.cache.set(cache_key, data)
+            validators = {
+                name: response_headers[header]
+                for name, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+                if response_headers.get(header)
+            }
+            if validators:
+                self.cache.set(validator_key, validators)
+            else:
+                self.cache.delete(validator_key)
+            return data
                 
         except Exception as e:
             log.error(f"Error making Jikan API request: {e}")
             return None
     
-    async def _make_mal_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
-        """Make a request to official MAL API with rate limiting"""
+    async def _make_mal_request(self, endpoint: str, params: Dict = None,
+                                priority: str = PRIORITY_INTERACTIVE, transform=None) -> Optional[Dict]:
+        """Make a request to official MAL API with rate limiting (see _make_jikan_request)"""
         if not self.client_id:
             log.warning("MAL API client ID not set, falling back to Jikan")
             return None
             
-        cache_key = f"mal:{endpoint}:{json.dumps(params or {})}"
-        
-        # Check cache first
-        cached_data = self.cache.get(cache_key)
-        if cached_data is not None:
-            return cached_data
-            
-        # Handle rate limiting
-        await self._handle_rate_limit("mal")
+        cache_key = self._cache_key("mal", endpoint, params, records=transform is not None)
+        return await self._cached_or_fetch(
+            cache_key, lambda: self._fetch_mal(endpoint, params, cache_key, priority, transform)
+        )
         
+    async def _fetch_mal(self, endpoint: str, params: Optional[Dict], cache_key: str,
+                         priority: str = PRIORITY_INTERACTIVE, transform=None) -> Optional[Dict]:
+        """Send a MAL request upstream and cache the response (see _fetch_jikan)"""
         try:
             url = f"{self.base_url}/{endpoint}"
             headers = {"X-MAL-CLIENT-ID": self.client_id}
             
-            async with self.session.get(url, params=params, headers=headers) as resp:
-                if resp.status != 200:
-                    log.error(f"MAL API error: {resp.status} for {url}")
-                    return None
-                    
-                data = await resp.json()
+            # Hedging samples upstream requests only, not cache hits
+            started = time.monotonic()
+            self.primary_requests.append(started)
+            try:
+                response = await self._send("mal", url, params, headers, priority)
+            except asyncio.CancelledError:
+                # Dropped once a hedge won, so it took at least this long
+                self.primary_latencies.append(time.monotonic() - started)
+                raise
+            if response is None:
+                return None
+            self.primary_latencies.append(time.monotonic() - started)
+            status, _, data = response
+            
+            if status == 404:
+                self.cache.set_negative(cache_key)
+                return None
+                
+            if status != 200:
+                log.error(f"MAL API error: {status} for {url}")
+                return None
                 
-                # Cache the response
-                self.cache.set(cache_key, data)
+            # Empty results are cached separately with a short TTL
+            if isinstance(data, dict) and data.get("data") == []:
+                self.cache.set_negative(cache_key, data)
                 return data
+            
+            # Cache the response
+            if transform is not None:
+                data = transform(data)
+            self.cache.set(cache_key, data)
+            return data
                 
         except Exception as e:
             log.error(f"Error making MAL API request: {e}")
             return None
     
-    async def search_anime(self, query: str, limit: int = 5) -> List[Dict]:
-        """Search for anime by name"""
-        # Try official API first if client ID is set
-        if self.client_id:
+    async def search_anime(self, query: str, limit: int = 5, priority: str = PRIORITY_INTERACTIVE) -> List[Dict]:
+        """Search for anime by name, answering from the local catalog when it knows the title"""
+        if self.catalog is not None:
+            local = self.catalog.search(query, limit)
+            if local is not None:
+                return local
+                
+        async def search_mal():
             params = {
                 "q": query,
                 "limit": limit,
                 "fields": "id,title,main_picture,alternative_titles,start_date,end_date,synopsis,mean,rank,popularity,num_episodes,media_type,status"
             }
             
-            result = await self._make_mal_request("anime", params)
+            result = await self._make_mal_request("anime", params, priority)
             if result and "data" in result:
-                return [item["node"] for item in result["data"]]
-                
-        # Fall back to Jikan API
-        params = {"q": query, "limit": limit}
-        result = await self._make_jikan_request("anime", params)
+                nodes = [item["node"] for item in result["data"]]
+                self._catalog_search(query, limit, [self._catalog_entry_mal(node) for node in nodes])
+                return nodes
+            return []
+            
+        async def search_jikan():
+            params = {"q": query, "limit": limit}
+            result = await self._make_jikan_request("anime", params, priority)
+            
+            if result and "data" in result:
+                self._catalog_search(query, limit, [self._catalog_entry_jikan(item) for item in result["data"]])
+                return result["data"]
+            return []
+            
+        # Try official API first if client ID is set, falling back to Jikan
+        if self.client_id:
+            return await self._primary_with_fallback(search_mal, search_jikan)
+        return await search_jikan()
         
-        if result and "data" in result:
-            return result["data"]
-        return []
+    def _catalog_search(self, query: str, limit: int, entries: List[Dict]) -> None:
+        """Add network search results to the catalog"""
+        if self.catalog is not None and entries:
+            self.catalog.add_search(query, limit, entries)
+            
+    def match_title(self, name: str) -> Optional[int]:
+        """Resolve a title or forum channel name to an anime ID from the local catalog"""
+        return self.catalog.match(name) if self.catalog is not None else None
+        
+    def link_forum(self, name: str, anime_id: int) -> None:
+        """Record which anime a forum channel was created for"""
+        if self.catalog is not None and anime_id:
+            self.catalog.link_forum(name, anime_id)
+            
+    def _catalog_add(self, entries: List[Dict]) -> None:
+        """Add fetched anime to the catalog"""
+        if self.catalog is not None and entries:
+            self.catalog.add_many(entries)
+            
+    @staticmethod
+    def _catalog_entry_jikan(item: Dict) -> Dict:
+        """Catalog entry for a raw Jikan anime object"""
+        aired = item.get("aired") or {}
+        return {
+            "id": item.get("mal_id"),
+            "title": item.get("title"),
+            "title_english": item.get("title_english"),
+            "title_japanese": item.get("title_japanese"),
+            "synonyms": item.get("title_synonyms") or [],
+            "type": item.get("type"),
+            "episodes": item.get("episodes"),
+            "score": item.get("score"),
+            "aired": {"from": aired.get("from"), "to": aired.get("to")} if aired.get("from") else None,
+            "image_url": item.get("images", {}).get("jpg", {}).get("image_url"),
+            "url": item.get("url")
+        }
+        
+    @staticmethod
+    def _catalog_entry_mal(node: Dict) -> Dict:
+        """Catalog entry for a raw MAL API anime node"""
+        alternative_titles = node.get("alternative_titles") or {}
+        return {
+            "id": node.get("id"),
+            "title": node.get("title"),
+            "title_english": alternative_titles.get("en"),
+            "title_japanese": alternative_titles.get("ja"),
+            "synonyms": alternative_titles.get("synonyms") or [],
+            "type": node.get("media_type"),
+            "episodes": node.get("num_episodes"),
+            "score": node.get("mean"),
+            "aired": {"from": node.get("start_date"), "to": node.get("end_date")} if node.get("start_date") else None,
+            "image_url": (node.get("main_picture") or {}).get("medium"),
+            "url": f"https://myanimelist.net/anime/{node.get('id')}"
+        }
     
-    async def get_anime_details(self, anime_id: int) -> Optional[Dict]:
+    async def get_anime_details(self, anime_id: int, priority: str = PRIORITY_INTERACTIVE) -> Optional[AnimeRecord]:
         """Get detailed information about an anime"""
-        # Try official API first if client ID is set
+        # Try official API first if client ID is set, falling back to Jikan
         if self.client_id:
-            params = {
-                "fields": "id,title,main_picture,alternative_titles,start_date,end_date,synopsis,mean,rank,popularity,num_episodes,media_type,status,genres,studios,related_anime,recommendations,background,pictures,statistics"
-            }
+            return await self._primary_with_fallback(
+                lambda: self._get_mal_details(anime_id, priority),
+                lambda: self._get_jikan_details(anime_id, priority)
+            )
+        return await self._get_jikan_details(anime_id, priority)
+        
+    async def get_anime_details_many(self, anime_ids: List[int], concurrency: int = 4,
+                                     priority: str = PRIORITY_INTERACTIVE) -> AsyncIterator[Tuple[int, Optional[AnimeRecord]]]:
+        """
+        Get details for many anime, yielding (anime_id, details) as they become available
+        
+        Cached entries are yielded straight away from one batched cache lookup.
+        The rest are fetched with at most `concurrency` requests in flight (the
+        rate limiter still applies) and yielded in completion order. details is
+        None for anime that couldn't be fetched. Stopping the iteration early
+        cancels the outstanding fetches.
+        """
+        anime_ids = list(dict.fromkeys(anime_ids))  # Drop duplicates, keep order
+        
+        # One batched lookup for every cache key the details could live under
+        mal_keys = {}
+        jikan_keys = {}
+        for anime_id in anime_ids:
+            if self.client_id:
+                mal_keys[anime_id] = self._cache_key("mal", f"anime/{anime_id}", self.MAL_DETAIL_PARAMS, records=True)
+            jikan_keys[anime_id] = self._cache_key("jikan", f"anime/{anime_id}/full", records=True)
+        # Only the key that served an anime counts as a hit; misses are counted
+        # by get_anime_details() below
+        cached = self.cache.get_many(list(mal_keys.values()) + list(jikan_keys.values()), record=False)
+        
+        misses = []
+        for anime_id in anime_ids:
+            if anime_id in mal_keys and isinstance(cached.get(mal_keys[anime_id]), AnimeRecord):
+                self.cache.metrics.record(mal_keys[anime_id], "hits")
+                yield anime_id, cached[mal_keys[anime_id]]
+            elif isinstance(cached.get(jikan_keys[anime_id], {}).get("data"), AnimeRecord):
+                self.cache.metrics.record(jikan_keys[anime_id], "hits")
+                yield anime_id, cached[jikan_keys[anime_id]]["data"]
+            else:
+                misses.append(anime_id)
+                
+        if not misses:
+            return
             
-            result = await self._make_mal_request(f"anime/{anime_id}", params)
-            if result:
-                # Format the response to be more consistent
-                return {
-                    "id": result.get("id"),
-                    "title": result.get("title"),
-                    "title_english": result.get("alternative_titles", {}).get("en"),
-                    "title_japanese": result.get("alternative_titles", {}).get("ja"),
-                    "synopsis": result.get("synopsis"),
-                    "episodes": result.get("num_episodes"),
-                    "score": result.get("mean"),
-                    "rank": result.get("rank"),
-                    "popularity": result.get("popularity"),
-                    "image_url": result.get("main_picture", {}).get("large") or result.get("main_picture", {}).get("medium"),
-                    "type": result.get("media_type"),
-                    "status": result.get("status"),
-                    "genres": [genre["name"] for genre in result.get("genres", [])],
-                    "studios": [studio["name"] for studio in result.get("studios", [])],
-                    "airing": result.get("status") == "currently_airing",
-                    "aired": {
-                        "from": result.get("start_date"),
-                        "to": result.get("end_date")
-                    },
-                    "background": result.get("background"),
-                    "url": f"https://myanimelist.net/anime/{anime_id}"
-                }
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def fetch(anime_id):
+            async with semaphore:
+                return anime_id, await self.get_anime_details(anime_id, priority)
                 
-        # Fall back to Jikan API
-        result = await self._make_jikan_request(f"anime/{anime_id}/full")
+        tasks = [asyncio.ensure_future(fetch(anime_id)) for anime_id in misses]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
         
-        if result and "data" in result:
-            data = result["data"]
-            # Clean and standardize the data
-            return {
-                "id": data.get("mal_id"),
-                "title": data.get("title"),
-                "title_english": data.get("title_english"),
-                "title_japanese": data.get("title_japanese"),
-                "synopsis": data.get("synopsis"),
-                "episodes": data.get("episodes"),
-                "score": data.get("score"),
-                "rank": data.get("rank"),
-                "popularity": data.get("popularity"),
-                "image_url": data.get("images", {}).get("jpg", {}).get("large_image_url"),
-                "type": data.get("type"),
-                "status": data.get("status"),
-                "genres": [genre["name"] for genre in data.get("genres", [])],
-                "studios": [studio["name"] for studio in data.get("studios", [])],
-                "airing": data.get("airing", False),
-                "aired": data.get("aired", {}),
-                "background": data.get("background"),
-                "url": data.get("url")
-            }
-            
+    async def _get_mal_details(self, anime_id: int, priority: str) -> Optional[AnimeRecord]:
+        """Get anime details from the official MAL API"""
+        result = await self._make_mal_request(
+            f"anime/{anime_id}", self.MAL_DETAIL_PARAMS, priority, transform=self._mal_details_record
+        )
+        return result if isinstance(result, AnimeRecord) else None
+        
+    async def _get_jikan_details(self, anime_id: int, priority: str) -> Optional[AnimeRecord]:
+        """Get anime details from Jikan"""
+        result = await self._make_jikan_request(
+            f"anime/{anime_id}/full", priority=priority, transform=self._jikan_details_record
+        )
+        if result and isinstance(result.get("data"), AnimeRecord):
+            return result["data"]
         return None
         
-    async def get_seasonal_anime(self, year: int = None, season: str = None, limit: int = 15) -> List[Dict]:
-        """Get seasonal anime, defaults to current season"""
+    def _mal_details_record(self, result: Dict) -> AnimeRecord:
+        """Transform for MAL anime/{id} responses: catalog the anime, keep a record"""
+        self._catalog_add([self._catalog_entry_mal(result)])
+        return AnimeRecord.from_mal(result)
+        
+    def _jikan_details_record(self, result: Dict) -> Dict:
+        """Transform for Jikan anime/{id}/full responses: catalog the anime, keep a record"""
+        self._catalog_add([self._catalog_entry_jikan(result["data"])])
+        return {"data": AnimeRecord.from_jikan(result["data"], "large_image_url")}
+        
+    def _jikan_list_records(self, result: Dict) -> Dict:
+        """Transform for Jikan anime lists (seasons, top, schedules): catalog them, keep records"""
+        self._catalog_add([self._catalog_entry_jikan(item) for item in result["data"]])
+        return {
+            "data": [AnimeRecord.from_jikan(item) for item in result["data"]],
+            "pagination": result.get("pagination", {})
+        }
+        
+    async def _iter_jikan_pages(self, endpoint: str, params: Dict = None, priority: str = PRIORITY_INTERACTIVE,
+                                fresh: bool = False) -> AsyncIterator[AnimeRecord]:
+        """
+        Yield AnimeRecords from a paginated Jikan anime list, fetching pages lazily
+        
+        Each page is requested (and cached) only once the previous one has been
+        consumed, following pagination.has_next_page. With fresh, every page
+        is requested upstream instead of served from the cache.
+        """
+        page = 1
+        while True:
+            result = await self._make_jikan_request(
+                endpoint, dict(params or {}, page=page), priority, transform=self._jikan_list_records, fresh=fresh
+            )
+            if not result or "data" not in result:
+                return
+                
+            for item in result["data"]:
+                yield item
+                
+            if not result.get("pagination", {}).get("has_next_page"):
+                return
+            page += 1
+            
+    async def iter_seasonal_anime(self, year: int = None, season: str = None, page_size: int = 25,
+                                  priority: str = PRIORITY_INTERACTIVE, fresh: bool = False) -> AsyncIterator[AnimeRecord]:
+        """Iterate over every anime of a season (defaults to current), one page at a time"""
         if year and season:
             endpoint = f"seasons/{year}/{season}"
         else:
             endpoint = "seasons/now"
             
-        params = {"limit": limit}
-        result = await self._make_jikan_request(endpoint, params)
+        async for anime in self._iter_jikan_pages(endpoint, {"limit": page_size}, priority, fresh):
+            yield anime
+            
+    async def iter_top_anime(self, filter_type: str = "all", page_size: int = 25,
+                             priority: str = PRIORITY_INTERACTIVE) -> AsyncIterator[AnimeRecord]:
+        """Iterate over top-rated anime, one page at a time"""
+        params = {"limit": page_size, "type": filter_type}
+        async for anime in self._iter_jikan_pages("top/anime", params, priority):
+            yield anime
         
-        if result and "data" in result:
-            # Format the results consistently
-            anime_list = []
-            for item in result["data"][:limit]:
-                anime_list.append({
-                    "id": item.get("mal_id"),
-                    "title": item.get("title"),
-                    "synopsis": item.get("synopsis"),
-                    "episodes": item.get("episodes"),
-                    "score": item.get("score"),
-                    "image_url": item.get("images", {}).get("jpg", {}).get("image_url"),
-                    "airing_start": item.get("aired", {}).get("from"),
-                    "type": item.get("type"),
-                    "genres": [genre["name"] for genre in item.get("genres", [])],
-                    "url": item.get("url")
-                })
-            return anime_list
-        return []
+    async def refresh_catalog(self, top_limit: int = 200, priority: str = PRIORITY_BULK) -> None:
+        """Fill the catalog from the current season and the top-rated list"""
+        async for _ in self.iter_seasonal_anime(priority=priority):
+            pass
+            
+        count = 0
+        async for _ in self.iter_top_anime(priority=priority):
+            count += 1
+            if count >= top_limit:
+                break
+    
+    async def prewarm_season(self, season: str = None, year: int = None, top_details: int = 25,
+                             priority: str = PRIORITY_BULK) -> Dict[str, int]:
+        """
+        Fill the cache with what users ask for first after a season change
+        
+        Fetches the whole list of the given season (defaults to the local
+        calendar's), bypassing the cache so pages cached during the previous
+        season aren't served as the new one. Once the season has anime, the
+        current season list (the pages seasonal forum builds read) and the
+        next season's first page (what upcoming reads) are refetched too,
+        the week schedule is rebuilt and details are fetched for the
+        `top_details` most popular anime of the season. Everything runs at
+        `priority`, so interactive commands still go first.
+        
+        Returns:
+        --------
+        Dict[str, int]: Number of season anime, upcoming anime, scheduled anime and details warmed.
+        season is 0 if Jikan has nothing for the season yet; nothing else is fetched then.
+        """
+        if not (season and year):
+            now = datetime.now()
+            season, year = calculate_anime_seasons(now.year, now.month)
+            
+        season_anime = []
+        async for anime in self.iter_seasonal_anime(year, season, priority=priority, fresh=True):
+            season_anime.append(anime)
+        if not season_anime:
+            return {"season": 0, "upcoming": 0, "schedule": len(self.schedule_by_id), "details": 0}
+            
+        async for _ in self.iter_seasonal_anime(priority=priority, fresh=True):
+            pass
         
-    async def get_top_anime(self, limit: int = 15, filter_type: str = "all") -> List[Dict]:
+        next_season, next_year = next_anime_season()
+        upcoming = []
+        async for anime in self.iter_seasonal_anime(next_year, next_season, priority=priority, fresh=True):
+            upcoming.append(anime)
+            if len(upcoming) >= 25:
+                break
+        
+        await self.refresh_schedule(priority)
+        
+        # Most popular first; anime without a popularity rank go last
+        season_anime.sort(key=lambda anime: anime.popularity or float("inf"))
+        details = 0
+        async for _, record in self.get_anime_details_many(
+            [anime.id for anime in season_anime[:top_details]], concurrency=2, priority=priority
+        ):
+            if record:
+                details += 1
+        
+        return {
+            "season": len(season_anime),
+            "upcoming": len(upcoming),
+            "schedule": len(self.schedule_by_id),
+            "details": details
+        }
+    
+    async def get_seasonal_anime(self, year: int = None, season: str = None, limit: int = 15,
+                                 priority: str = PRIORITY_INTERACTIVE) -> List[AnimeRecord]:
+        """
+        Get seasonal anime, defaults to current season
+        
+        Always reads full 25-anime pages and stops at limit, so every caller
+        shares the cached pages the prewarm and the forum builds fill.
+        """
+        anime_list = []
+        async for anime in self.iter_seasonal_anime(year, season, 25, priority):
+            anime_list.append(anime)
+            if len(anime_list) >= limit:
+                break
+        return anime_list
+        
+    async def get_top_anime(self, limit: int = 15, filter_type: str = "all",
+                            priority: str = PRIORITY_INTERACTIVE) -> List[AnimeRecord]:
         """Get top-rated anime"""
-        params = {"limit": limit, "type": filter_type}
-        result = await self._make_jikan_request("top/anime", params)
+        anime_list = []
+        async for anime in self.iter_top_anime(filter_type, min(limit, 25), priority):
+            anime_list.append(anime)
+            if len(anime_list) >= limit:
+                break
+        return anime_list
         
-        if result and "data" in result:
-            # Format the results consistently
-            anime_list = []
-            for item in result["data"][:limit]:
-                anime_list.append({
-                    "id": item.get("mal_id"),
-                    "title": item.get("title"),
-                    "synopsis": item.get("synopsis"),
-                    "episodes": item.get("episodes"),
-                    "score": item.get("score"),
-                    "image_url": item.get("images", {}).get("jpg", {}).get("image_url"),
-                    "type": item.get("type"),
-                    "genres": [genre["name"] for genre in item.get("genres", [])],
-                    "url": item.get("url")
-                })
-            return anime_list
-        return []
+    @staticmethod
+    def _schedule_day(broadcast_day: Optional[str]) -> str:
+        """Weekday name for a Jikan broadcast day ("Mondays" -> "Monday")"""
+        day = (broadcast_day or "").rstrip("s").capitalize()
+        return day if day in WEEKDAYS else "Unknown"
         
-    async def get_anime_schedule(self, weekday: str = None) -> Dict[str, List[Dict]]:
-        """Get anime airing schedule, optionally filtered by weekday"""
-        if weekday:
-            endpoint = f"schedules/{weekday.lower()}"
-        else:
-            endpoint = "schedules"
+    async def refresh_schedule(self, priority: str = PRIORITY_BACKGROUND) -> bool:
+        """
+        Fetch every page of the week's schedule and rebuild the weekday and ID indexes
+        
+        Concurrent calls share one refresh. The previous snapshot is kept if
+        any page of the schedule couldn't be fetched.
+        
+        Returns:
+        --------
+        bool: True if a new snapshot was built
+        """
+        if self._schedule_refresh is None or self._schedule_refresh.done():
+            self._schedule_refresh = asyncio.ensure_future(self._build_schedule(priority))
+        return await asyncio.shield(self._schedule_refresh)
+        
+    async def _build_schedule(self, priority: str) -> bool:
+        """
+        Build a schedule snapshot (see refresh_schedule)
+        
+        Pages are fetched fresh. They are cached for about as long as
+        schedule_interval, so cached pages would make every snapshot a cycle
+        old, and could mix pages of different ages.
+        
+        A walk that stops at a page that couldn't be fetched (and had no
+        cached copy) only replaces the snapshot if there is none yet, so a
+        failed page doesn't drop whole days from a complete schedule.
+        """
+        by_day = {day: [] for day in WEEKDAYS}
+        by_id = {}
+        page = 1
+        while True:
+            result = await self._make_jikan_request(
+                "schedules", {"limit": 25, "page": page}, priority, transform=self._jikan_list_records, fresh=True
+            )
+            if not result or "data" not in result:
+                if self.schedule_by_id:
+                    log.warning(f"Schedule page {page} unavailable, keeping the previous snapshot")
+                    return False
+                break
+                
+            for anime in result["data"]:
+                if anime.id in by_id:
+                    continue  # Pages can shift while we walk them
+                by_id[anime.id] = anime
+                by_day.setdefault(self._schedule_day(anime.broadcast_day), []).append(anime)
+                
+            if not result.get("pagination", {}).get("has_next_page"):
+                break
+            page += 1
             
-        result = await self._make_jikan_request(endpoint)
+        if not by_id:
+            return False
+            
+        self.schedule_by_day = by_day
+        self.schedule_by_id = by_id
+        self.schedule_updated = time.monotonic()
+        return True
         
-        if result and "data" in result:
-            # Group by weekday
-            schedule = {}
-            for item in result["data"]:
-                weekday = item.get("broadcast", {}).get("day", "Unknown")
-                if weekday not in schedule:
-                    schedule[weekday] = []
-                    
-                schedule[weekday].append({
-                    "id": item.get("mal_id"),
-                    "title": item.get("title"),
-                    "episodes": item.get("episodes"),
-                    "score": item.get("score"),
-                    "image_url": item.get("images", {}).get("jpg", {}).get("image_url"),
-                    "time": item.get("broadcast", {}).get("time"),
-                    "url": item.get("url")
-                })
-            return schedule
-        return {}
-        
-    async def get_upcoming_anime(self, limit: int = 15, query: str = None) -> List[Dict]:
-        """Get upcoming anime for next season, optionally filtered by query"""
-        # Get current season info to determine next season
-        current_season = await self._make_jikan_request("seasons/now", {"limit": 1})
-        if not current_season or "data" not in current_season or not current_season["data"]:
-            return []
+    async def schedule_refresher(self):
+        """Background task that refreshes the schedule snapshot every schedule_interval seconds"""
+        while True:
+            try:
+                await self.refresh_schedule()
+            except Exception as e:
+                log.error(f"Error refreshing anime schedule: {e}")
+                
+            await asyncio.sleep(self.schedule_interval)
+            
+    async def _ensure_schedule(self, priority: str) -> None:
+        """Refresh the snapshot on demand if it is missing or the refresher fell behind"""
+        if not self.schedule_by_id or time.monotonic() - self.schedule_updated > 2 * self.schedule_interval:
+            await self.refresh_schedule(priority)
+            
+    async def get_anime_schedule(self, weekday: str = None,
+                                 priority: str = PRIORITY_INTERACTIVE) -> Dict[str, List[AnimeRecord]]:
+        """Get anime airing schedule from the week snapshot, optionally filtered by weekday"""
+        await self._ensure_schedule(priority)
+        
+        if weekday:
+            day = weekday.capitalize()
+            return {day: list(self.schedule_by_day[day])} if self.schedule_by_day.get(day) else {}
+        return {day: list(anime) for day, anime in self.schedule_by_day.items() if anime}
+        
+    async def get_scheduled_anime(self, anime_ids: List[int], weekday: str = None,
+                                  priority: str = PRIORITY_INTERACTIVE) -> List[AnimeRecord]:
+        """Schedule entries for the given anime IDs, optionally only those airing on a weekday"""
+        await self._ensure_schedule(priority)
+        
+        day = weekday.capitalize() if weekday else None
+        scheduled = []
+        for anime_id in anime_ids:
+            anime = self.schedule_by_id.get(anime_id)
+            if anime and (day is None or self._schedule_day(anime.broadcast_day) == day):
+                scheduled.append(anime)
+        return scheduled
+        
+    async def get_upcoming_anime(self, limit: int = 15, query: str = None,
+                                 priority: str = PRIORITY_INTERACTIVE) -> List[AnimeRecord]:
+        """
+        Get upcoming anime for next season, optionally filtered by query
+        
+        The next season comes from the local calendar, so this is at most one
+        (cached) request for the season's first page. The query is matched
+        word by word against every title of each anime.
+        """
+        next_season, next_year = next_anime_season()
+        upcoming_anime = await self.get_seasonal_anime(next_year, next_season, 25, priority)
+        
+        if not query:
+            return upcoming_anime[:limit]
             
-        # Extract current season and year
-        sample_anime = current_season["data"][0]
-        current_year = int(sample_anime.get("year", datetime.now().year))
-        current_season_name = sample_anime.get("season", "").lower()
-        
-        # Calculate next season
-        seasons = ["winter", "spring", "summer", "fall"]
-        current_idx = seasons.index(current_season_name) if current_season_name in seasons else 0
-        next_idx = (current_idx + 1) % 4
-        next_season = seasons[next_idx]
-        next_year = current_year + 1 if next_idx == 0 else current_year
-        
-        # Get next season anime
-        upcoming_anime = await self.get_seasonal_anime(next_year, next_season, limit)
-        
-        # Filter results if query is provided
-        if query and upcoming_anime:
-            filtered_anime = []
-            query = query.lower()
-            for anime in upcoming_anime:
-                if query in anime.get("title", "").lower():
-                    filtered_anime.append(anime)
-            return filtered_anime
-        
-        return upcoming_anime
-        
-    async def get_recommendations(self, anime_id: int, limit: int = 10) -> List[Dict]:
+        # Index the titles once per distinct list, not once per query
+        key = (next_season, next_year, tuple(anime.id for anime in upcoming_anime))
+        if key != self._upcoming_key:
+            self._upcoming_terms = [
+                {term for title in (anime.title, anime.title_english, anime.title_japanese)
+                 for term in title_terms(normalize_title(title))}
+                for anime in upcoming_anime
+            ]
+            self._upcoming_key = key
+            
+        query_terms = title_terms(normalize_title(query))
+        matches = [
+            anime for anime, terms in zip(upcoming_anime, self._upcoming_terms)
+            if query_matches(query_terms, terms)
+        ]
+        return matches[:limit]
+        
+    async def get_recommendations(self, anime_id: int, limit: int = 10,
+                                  priority: str = PRIORITY_INTERACTIVE) -> List[Dict]:
         """Get anime recommendations based on a specific anime"""
-        result = await self._make_jikan_request(f"anime/{anime_id}/recommendations")
+        result = await self._make_jikan_request(f"anime/{anime_id}/recommendations", priority=priority)
         
         if result and "data" in result:
             recommendations = []
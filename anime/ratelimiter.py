@@ -0,0 +1,229 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+log = logging.getLogger("red.animeforum.rate_limiter")
+
+# Priority lanes, highest priority first
+PRIORITY_INTERACTIVE = "interactive"  # Commands a user is waiting on
+PRIORITY_BACKGROUND = "background"    # Periodic jobs such as the schedule checker
+PRIORITY_BULK = "bulk"                # Large batch jobs, only use spare capacity
+PRIORITY_LANES = (PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND, PRIORITY_BULK)
+
+class TokenBucket:
+    """Token bucket allowing `capacity` requests per `period` seconds"""
+
+    def __init__(self, capacity: int, period: float):
+        """
+        Initialize token bucket
+
+        Parameters:
+        -----------
+        capacity: int
+            Maximum number of tokens (the burst size)
+        period: float
+            Seconds it takes to refill the bucket from empty
+        """
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period  # Tokens per second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        """Add the tokens accrued since the last update"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        self.refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Consume one token (call only after wait_time() returned 0)"""
+        self.tokens -= 1
+
+    def limit_to(self, remaining: int) -> None:
+        """Lower the available tokens to what the server says is left"""
+        self.tokens = min(self.tokens, float(remaining))
+
+
+class RateLimiter:
+    """
+    Rate limiter made of several token buckets that must all have a token
+
+    Jikan, for example, allows 3 requests per second and 60 per minute, which
+    is two buckets. Callers only wait while a bucket is empty, so requests run
+    concurrently as long as there is budget left.
+
+    Each request belongs to a priority lane. When callers have to wait, tokens
+    go to interactive requests first, then background ones. Bulk requests
+    also leave a share of the longest bucket untouched for the other lanes.
+    """
+
+    def __init__(self, name: str, limits: List[Tuple[int, float]], bulk_reserve: float = 0.25):
+        """
+        Initialize rate limiter
+
+        Parameters:
+        -----------
+        name: str
+            Name of the upstream, used in logs and stats
+        limits: List[Tuple[int, float]]
+            (requests, period_seconds) pairs, e.g. [(3, 1), (60, 60)]
+        bulk_reserve: float
+            Fraction of the longest bucket that bulk requests may not use
+        """
+        self.name = name
+        self.buckets = [TokenBucket(capacity, period) for capacity, period in limits]
+        self.longest = max(self.buckets, key=lambda bucket: bucket.period)
+        self.bulk_reserve = int(self.longest.capacity * bulk_reserve)
+        self.blocked_until = 0.0  # Monotonic time before which nothing is sent
+        
+        # Waiting callers per lane, served by the dispatcher in priority order
+        self.queues: Dict[str, deque] = {lane: deque() for lane in PRIORITY_LANES}
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.wakeup = asyncio.Event()
+        
+        self.lane_stats = {
+            lane: {"acquired": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for lane in PRIORITY_LANES
+        }
+
+    def _wait_time(self, now: float, lane: str = PRIORITY_INTERACTIVE) -> float:
+        """Seconds until every bucket has a token for a request in the given lane"""
+        wait = max(bucket.wait_time(now) for bucket in self.buckets)
+        
+        if lane == PRIORITY_BULK and self.bulk_reserve:
+            # Bulk requests need the reserve plus one token in the longest bucket
+            missing = self.bulk_reserve + 1 - self.longest.tokens
+            if missing > 0:
+                wait = max(wait, missing / self.longest.rate)
+                
+        return max(wait, self.blocked_until - now)
+        
+    def _take(self, lane: str, started: float) -> None:
+        """Consume a token from every bucket and record the lane's queue wait"""
+        for bucket in self.buckets:
+            bucket.take()
+            
+        waited = time.monotonic() - started
+        stats = self.lane_stats[lane]
+        stats["acquired"] += 1
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+
+    async def acquire(self, priority: str = PRIORITY_INTERACTIVE) -> None:
+        """
+        Wait until a request may be sent, then consume a token from every bucket
+        
+        Parameters:
+        -----------
+        priority: str
+            Lane of the request: "interactive", "background" or "bulk"
+        """
+        if priority not in self.queues:
+            priority = PRIORITY_INTERACTIVE
+            
+        started = time.monotonic()
+        
+        # Fast path: nobody is queued and there is budget for this lane
+        if not any(self.queues.values()) and self._wait_time(started, priority) <= 0:
+            self._take(priority, started)
+            return
+            
+        waiter = asyncio.get_running_loop().create_future()
+        self.queues[priority].append((waiter, started))
+        self.wakeup.set()
+        
+        if self.dispatcher is None or self.dispatcher.done():
+            self.dispatcher = asyncio.ensure_future(self._dispatch())
+            
+        await waiter
+        
+    async def _dispatch(self) -> None:
+        """Hand out tokens to queued callers, highest priority lane first"""
+        while True:
+            lane = next((lane for lane in PRIORITY_LANES if self.queues[lane]), None)
+            if lane is None:
+                return
+                
+            waiter, started = self.queues[lane][0]
+            if waiter.done():
+                # Caller was cancelled while waiting
+                self.queues[lane].popleft()
+                continue
+                
+            wait = self._wait_time(time.monotonic(), lane)
+            if wait > 0:
+                # Sleep until a token is due, or until a new caller might outrank this one
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+                
+            self.queues[lane].popleft()
+            self._take(lane, started)
+            waiter.set_result(None)
+
+    def update_from_headers(self, headers) -> None:
+        """
+        Sync the longest bucket with X-RateLimit-* response headers
+
+        X-RateLimit-Remaining caps the tokens left; when it reaches zero,
+        X-RateLimit-Reset (a unix timestamp) blocks requests until then.
+        """
+        try:
+            remaining = headers.get("X-RateLimit-Remaining")
+            if remaining is None:
+                return
+            remaining = int(remaining)
+            reset_time = int(headers.get("X-RateLimit-Reset", 0))
+        except (TypeError, ValueError):
+            return
+
+        self.longest.limit_to(remaining)
+
+        if remaining <= 0 and reset_time:
+            self.block(reset_time - time.time())
+
+    def block(self, seconds: float) -> None:
+        """Stop sending requests for the given number of seconds (e.g. after a 429)"""
+        if seconds <= 0:
+            return
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        log.info(f"{self.name} rate limit reached, pausing for {seconds:.2f} seconds")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get rate limiter statistics
+
+        Returns:
+        --------
+        Dict[str, Any]: Tokens left per bucket and queue length/wait per lane
+        """
+        now = time.monotonic()
+        for bucket in self.buckets:
+            bucket.refill(now)
+            
+        lanes = {}
+        for lane, stats in self.lane_stats.items():
+            lanes[lane] = {
+                "queued": len(self.queues[lane]),
+                "acquired": stats["acquired"],
+                "avg_wait": round(stats["total_wait"] / stats["acquired"], 3) if stats["acquired"] else 0.0,
+                "max_wait": round(stats["max_wait"], 3)
+            }
+            
+        return {
+            "tokens": [f"{bucket.tokens:.1f}/{bucket.capacity} per {bucket.period:g}s" for bucket in self.buckets],
+            "lanes": lanes,
+            "blocked_for": round(max(0.0, self.blocked_until - now), 1)
+        }
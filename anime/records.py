@@ -0,0 +1,150 @@
+import sys
+from typing import Dict, Any
+
+from .cachemanager import register_type
+
+
+@register_type
+class AnimeRecord:
+    """
+    Compact, normalized anime entry built once when a response is fetched
+
+    Only the fields the cog displays are kept, genres and studios are interned
+    (the same few dozen names repeat across every anime), and __slots__ avoids
+    a per-instance dict. Records are cached in place of the raw API payload.
+
+    Records read like the dicts the API methods used to return: record.get(),
+    record["title"] and `in` work, including the derived "aired",
+    "airing_start", "broadcast" and "time" keys.
+    """
+
+    __slots__ = (
+        "id", "title", "title_english", "title_japanese", "synopsis", "episodes",
+        "score", "rank", "popularity", "image_url", "type", "status", "genres",
+        "studios", "airing", "aired_from", "aired_to", "background", "url",
+        "broadcast_day", "broadcast_time"
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+        self.genres = tuple(sys.intern(genre) for genre in self.genres or ())
+        self.studios = tuple(sys.intern(studio) for studio in self.studios or ())
+        self.airing = bool(self.airing)
+
+    @classmethod
+    def from_jikan(cls, item: Dict, image_size: str = "image_url") -> "AnimeRecord":
+        """
+        Build a record from a Jikan anime object
+
+        Parameters:
+        -----------
+        item: Dict
+            Anime object from any Jikan endpoint (details, seasons, top, schedules)
+        image_size: str
+            Key of the JPG image to keep, "image_url" or "large_image_url"
+        """
+        aired = item.get("aired") or {}
+        broadcast = item.get("broadcast") or {}
+        return cls(
+            id=item.get("mal_id"),
+            title=item.get("title"),
+            title_english=item.get("title_english"),
+            title_japanese=item.get("title_japanese"),
+            synopsis=item.get("synopsis"),
+            episodes=item.get("episodes"),
+            score=item.get("score"),
+            rank=item.get("rank"),
+            popularity=item.get("popularity"),
+            image_url=item.get("images", {}).get("jpg", {}).get(image_size),
+            type=item.get("type"),
+            status=item.get("status"),
+            genres=[genre["name"] for genre in item.get("genres", [])],
+            studios=[studio["name"] for studio in item.get("studios", [])],
+            airing=item.get("airing", False),
+            aired_from=aired.get("from"),
+            aired_to=aired.get("to"),
+            background=item.get("background"),
+            url=item.get("url"),
+            broadcast_day=broadcast.get("day"),
+            broadcast_time=broadcast.get("time")
+        )
+
+    @classmethod
+    def from_mal(cls, node: Dict) -> "AnimeRecord":
+        """Build a record from an official MAL API anime object"""
+        alternative_titles = node.get("alternative_titles") or {}
+        picture = node.get("main_picture") or {}
+        broadcast = node.get("broadcast") or {}
+        return cls(
+            id=node.get("id"),
+            title=node.get("title"),
+            title_english=alternative_titles.get("en"),
+            title_japanese=alternative_titles.get("ja"),
+            synopsis=node.get("synopsis"),
+            episodes=node.get("num_episodes"),
+            score=node.get("mean"),
+            rank=node.get("rank"),
+            popularity=node.get("popularity"),
+            image_url=picture.get("large") or picture.get("medium"),
+            type=node.get("media_type"),
+            status=node.get("status"),
+            genres=[genre["name"] for genre in node.get("genres", [])],
+            studios=[studio["name"] for studio in node.get("studios", [])],
+            airing=node.get("status") == "currently_airing",
+            aired_from=node.get("start_date"),
+            aired_to=node.get("end_date"),
+            background=node.get("background"),
+            url=f"https://myanimelist.net/anime/{node.get('id')}",
+            broadcast_day=broadcast.get("day_of_the_week"),
+            broadcast_time=broadcast.get("start_time")
+        )
+
+    def _derived(self, key: str) -> Any:
+        """Values of the dict-style keys that aren't stored as slots"""
+        if key == "aired":
+            return {"from": self.aired_from, "to": self.aired_to}
+        if key == "airing_start":
+            return self.aired_from
+        if key == "broadcast":
+            return {"day": self.broadcast_day, "time": self.broadcast_time}
+        if key == "time":
+            return self.broadcast_time
+        raise KeyError(key)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.__slots__:
+            return getattr(self, key)
+        return self._derived(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ or key in ("aired", "airing_start", "broadcast", "time")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict.get() equivalent; missing values (None) return the default"""
+        try:
+            value = self[key]
+        except KeyError:
+            return default
+        return default if value is None else value
+
+    def keys(self):
+        """Stored field names, so dict(record) gives a plain dict"""
+        return self.__slots__
+
+    def to_json(self) -> Dict[str, Any]:
+        """Compact dict of the set fields, for the disk cache"""
+        data = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if value is not None and value != ():
+                data[name] = list(value) if isinstance(value, tuple) else value
+        return data
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "AnimeRecord":
+        """Rebuild a record written by to_json()"""
+        return cls(**data)
+
+    def __repr__(self) -> str:
+        return f"<AnimeRecord id={self.id} title={self.title!r}>"
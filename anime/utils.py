@@ -5,6 +5,8 @@ import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 
+from .catalog import normalize_title
+
 log = logging.getLogger("red.animeforum.utils")
 
 async def check_permissions(ctx) -> bool:
@@ -154,6 +156,29 @@ def sanitize_filename(name: str) -> str:
         
     return name.lower()
 
+def find_anime_channel(channels, title: str, anime_id: int = None, match_title=None):
+    """
+    Find the channel that belongs to an anime
+    
+    Names are compared in normalized form, so punctuation Discord drops from
+    channel names doesn't cause a miss. Given an anime_id and match_title
+    (e.g. MyAnimeListAPI.match_title), channels whose name resolves to that
+    anime match too.
+    """
+    channels = list(channels)
+    wanted = normalize_title(title)
+    
+    for channel in channels:
+        if wanted and normalize_title(channel.name) == wanted:
+            return channel
+            
+    if anime_id and match_title:
+        for channel in channels:
+            if match_title(channel.name) == anime_id:
+                return channel
+                
+    return None
+
 def extract_episode_number(title: str) -> Optional[int]:
     """Extract episode number from a title string"""
     # Common patterns for episode numbers
@@ -223,6 +248,18 @@ def calculate_anime_seasons(year: int, month: int) -> Tuple[str, int]:
     else:  # 10-12
         return "fall", year
 
+def next_anime_season(now: datetime = None) -> Tuple[str, int]:
+    """
+    The anime season after the current one, from the local calendar
+    
+    Returns:
+    --------
+    Tuple[str, int]: (season name, year)
+    """
+    now = now or datetime.now()
+    month = now.month + 3
+    return calculate_anime_seasons(now.year + (month - 1) // 12, (month - 1) % 12 + 1)
+
 def convert_to_discord_timestamp(dt, format_code="f"):
     """
     Convert a datetime to a Discord timestamp
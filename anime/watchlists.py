@@ -0,0 +1,137 @@
+import logging
+from typing import Dict, List, Set, FrozenSet
+
+from redbot.core import Config
+
+log = logging.getLogger("red.animeforum.watchlists")
+
+
+class WatchlistStore:
+    """
+    Per-member anime watchlists with an in-memory reverse index
+
+    Each member's watchlist is a dict keyed by anime ID (as a string, like
+    every Config key) in member scope, so adding or removing an anime writes
+    one key of one member. The reverse index maps guild -> anime ID -> user
+    IDs; it answers "is it on their list" and "who is watching X" without
+    reading Config, and is kept in step with every write.
+    """
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.config.register_member(watchlist={})  # {anime_id: entry}
+
+        self.index: Dict[int, Dict[int, Set[int]]] = {}  # {guild_id: {anime_id: {user_id}}}
+
+    async def load(self) -> None:
+        """Move legacy guild-level watchlists to members, then build the reverse index"""
+        await self._migrate_guild_watchlists()
+
+        self.index.clear()
+        all_members = await self.config.all_members()
+        for guild_id, members in all_members.items():
+            for user_id, data in members.items():
+                for anime_id in data.get("watchlist", {}):
+                    self._index_add(guild_id, int(user_id), int(anime_id))
+
+    async def _migrate_guild_watchlists(self) -> None:
+        """Convert the old {user_id: [entries]} guild dict into member watchlists"""
+        all_guilds = await self.config.all_guilds()
+        for guild_id, data in all_guilds.items():
+            legacy = data.get("watchlists")
+            if not legacy:
+                continue
+
+            for user_id, entries in legacy.items():
+                member = self.config.member_from_ids(guild_id, int(user_id))
+                watchlist = await member.watchlist()
+                for entry in entries:
+                    if entry.get("id") is not None:
+                        watchlist.setdefault(str(entry["id"]), entry)
+                await member.watchlist.set(watchlist)
+
+            await self.config.guild_from_id(guild_id).watchlists.clear()
+            log.info(f"Moved {len(legacy)} watchlists of guild {guild_id} to member storage")
+
+    def _index_add(self, guild_id: int, user_id: int, anime_id: int) -> None:
+        self.index.setdefault(guild_id, {}).setdefault(anime_id, set()).add(user_id)
+
+    def _index_remove(self, guild_id: int, user_id: int, anime_id: int) -> None:
+        watchers = self.index.get(guild_id, {}).get(anime_id)
+        if watchers is None:
+            return
+        watchers.discard(user_id)
+        if not watchers:
+            del self.index[guild_id][anime_id]
+
+    def contains(self, guild_id: int, user_id: int, anime_id: int) -> bool:
+        """Whether an anime is on a member's watchlist"""
+        return user_id in self.index.get(guild_id, {}).get(anime_id, ())
+
+    def watchers(self, guild_id: int, anime_id: int) -> FrozenSet[int]:
+        """User IDs with an anime on their watchlist"""
+        return frozenset(self.index.get(guild_id, {}).get(anime_id, ()))
+
+    def guild_ids(self) -> List[int]:
+        """Guilds with at least one watchlist entry"""
+        return [guild_id for guild_id, anime in self.index.items() if anime]
+
+    def watched_anime(self, guild_id: int) -> Dict[int, Set[int]]:
+        """Every anime on a watchlist in the guild, mapped to its watchers (do not modify)"""
+        return self.index.get(guild_id, {})
+
+    async def get(self, guild_id: int, user_id: int) -> List[Dict]:
+        """A member's watchlist entries, oldest first"""
+        watchlist = await self.config.member_from_ids(guild_id, user_id).watchlist()
+        return list(watchlist.values())
+
+    async def add(self, guild_id: int, user_id: int, entry: Dict) -> bool:
+        """
+        Add an entry to a member's watchlist
+
+        Returns:
+        --------
+        bool: False if the anime was already on the list
+        """
+        anime_id = int(entry["id"])
+        if self.contains(guild_id, user_id, anime_id):
+            return False
+
+        # Index first, so a concurrent add of the same anime sees it
+        self._index_add(guild_id, user_id, anime_id)
+        try:
+            await self.config.member_from_ids(guild_id, user_id).watchlist.set_raw(str(anime_id), value=entry)
+        except Exception:
+            self._index_remove(guild_id, user_id, anime_id)
+            raise
+        return True
+
+    async def remove(self, guild_id: int, user_id: int, anime_id: int) -> bool:
+        """
+        Remove an anime from a member's watchlist
+
+        Returns:
+        --------
+        bool: False if the anime wasn't on the list
+        """
+        anime_id = int(anime_id)
+        if not self.contains(guild_id, user_id, anime_id):
+            return False
+
+        await self.config.member_from_ids(guild_id, user_id).watchlist.clear_raw(str(anime_id))
+        self._index_remove(guild_id, user_id, anime_id)
+        return True
+
+    async def clear(self, guild_id: int, user_id: int) -> None:
+        """Empty a member's watchlist"""
+        member = self.config.member_from_ids(guild_id, user_id)
+        for anime_id in await member.watchlist():
+            self._index_remove(guild_id, user_id, int(anime_id))
+        await member.watchlist.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Watched anime and watchlist entries across all guilds"""
+        return {
+            "anime": sum(len(anime) for anime in self.index.values()),
+            "entries": sum(len(users) for anime in self.index.values() for users in anime.values())
+        }
@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("discord")
+pytest.importorskip("redbot")
+
+from anime.cachemanager import CacheManager
+from anime.circuitbreaker import STATE_HALF_OPEN
+from anime.malapi import MyAnimeListAPI
+from anime.ratelimiter import RateLimiter
+
+
+def test_probe_cancelled_while_rate_limited_releases_breaker():
+    async def scenario():
+        api = MyAnimeListAPI(session=None, cache=CacheManager())
+        api.rate_limiters["jikan"] = RateLimiter("jikan", [(1, 60.0)])
+        breaker = api.breakers["jikan"]
+
+        # Open the circuit and let the open period run out: the next request probes
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        breaker.open_until = time.monotonic() - 1
+
+        # Empty the bucket so the probe has to wait for a token, then cancel it
+        await api.rate_limiters["jikan"].acquire()
+        probe = asyncio.ensure_future(api._send("jikan", "https://api.jikan.moe/v4/anime/1"))
+        await asyncio.sleep(0.05)
+        assert breaker.state == STATE_HALF_OPEN and breaker.probing
+
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert not breaker.probing
+        assert breaker.allow()
+
+    asyncio.run(scenario())